@@ -1,10 +1,14 @@
 from flask import Blueprint, render_template, request, jsonify, make_response
+from six.moves.urllib.parse import urlencode
 
 from app.api.adapter.forms import SpecificationForm, SelectSpecificationForm
 from app.api.adapter.namespaces.business import get_requirements, create_requirement
 
 dialog_bp = Blueprint('dialog', __name__, template_folder='templates', static_folder='static')
 
+# Number of requirements of each page of the selection dialog
+page_size = 50
+
 
 @dialog_bp.route('/provider/<service_provider_id>/resources/selector', methods=['GET', 'POST'])
 def index(service_provider_id):
@@ -16,24 +20,29 @@ def index(service_provider_id):
 
     resource_type = request.args.get('type')
     if resource_type:
-        requirements = get_requirements(selection_url)
         terms = request.args.get('terms', None)
+        limit = request.args.get('limit', str(page_size))
+        if not limit.isdigit() or int(limit) == 0:
+            return make_response('The limit must be a positive number: {}'.format(limit), 400)
+
+        after = request.args.get('after')
+        requirements, next_after = get_requirements(selection_url, terms, fields=['Title'], after=after,
+                                                    limit=int(limit))
 
         results = list()
         for r in requirements:
-            if terms != '':
-                if r.identifier.__contains__(terms) or r.title.__contains__(terms) or r.description.__contains__(terms):
-                    results.append({
-                        'oslc:label': r.identifier + ' / ' + r.title,
-                        'rdf:resource': str(r.about)
-                    })
-            else:
-                results.append({
-                    'oslc:label': r.identifier + ' / ' + r.title,
-                    'rdf:resource': str(r.about)
-                })
-
-        return jsonify({'oslc:results': results})
+            results.append({
+                'oslc:label': r.identifier + ' / ' + r.title,
+                'rdf:resource': str(r.about)
+            })
+
+        response = {'oslc:results': results}
+        if next_after is not None:
+            args = request.args.to_dict()
+            args.update({'limit': limit, 'after': next_after})
+            response['oslc:nextPage'] = selection_url + '?' + urlencode(sorted(args.items()))
+
+        return jsonify(response)
 
     return render_template("dialogs/selector.html", selection_url=selection_url,
                            selection_type_url=selection_type_url, form=form, list_req=list_req)
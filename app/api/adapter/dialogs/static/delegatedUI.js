@@ -1,7 +1,23 @@
+// Number of results requested on each page, the next pages are loaded with the "More" button
+var pageSize = 20;
+var nextPage = null;
+
 function search(baseUrl) {
+    document.getElementById("results").options.length = 0;
+    terms = document.getElementById("searchTerms").value;
+    loadResults(baseUrl + "&terms=" + encodeURIComponent(terms) + "&limit=" + pageSize);
+}
+
+function loadMore() {
+    if (nextPage) {
+        loadResults(nextPage);
+    }
+}
+
+function loadResults(url) {
     var ie = window.navigator.userAgent.indexOf("MSIE");
     list = document.getElementById("results");
-    list.options.length = 0;
+    var moreResults = document.getElementById('moreResults');
     var searchMessage = document.getElementById('searchMessage');
     var loadingMessage = document.getElementById('loadingMessage');
     xmlhttp = new XMLHttpRequest();
@@ -20,12 +36,15 @@ function search(baseUrl) {
                     list.add(item, null);
                 }
             }
+            nextPage = resp["oslc:nextPage"] || null;
+            if (moreResults) {
+                moreResults.style.display = nextPage ? 'inline' : 'none';
+            }
             searchMessage.style.display = 'block';
             loadingMessage.style.display = 'none';
         }
     };
-    terms = document.getElementById("searchTerms").value;
-    xmlhttp.open("GET", baseUrl + "&terms=" + encodeURIComponent(terms), true);
+    xmlhttp.open("GET", url, true);
     searchMessage.style.display = 'none';
     loadingMessage.style.display = 'block';
     xmlhttp.send();
@@ -1,15 +1,26 @@
+from app.api.adapter.namespaces.business import get_repository
 from app.api.adapter.services.specification import Specification
 
 
 class CSVImplementation(object):
 
+    default_project = 'Project-1'
+
     @classmethod
     def get_service_provider_info(cls):
+        """
+        Returns a service provider for each project
+        of the requirements on the repository.
+        """
+        projects = set()
+        for requirement in get_repository().iter(fields=['Project']):
+            projects.update(project for project in requirement.subject if project)
+
         service_providers = [{
-            'id': 'Project-1',
-            'name': 'PyOSLC Service Provider for Project 1',
+            'id': project,
+            'name': 'PyOSLC Service Provider for {}'.format(project),
             'class': Specification
-        }]
+        } for project in sorted(projects or [cls.default_project])]
 
         return service_providers
 
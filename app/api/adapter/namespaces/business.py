@@ -1,99 +1,250 @@
 import csv
-import os
-import shutil
-from tempfile import NamedTemporaryFile
+import itertools
 
-from rdflib import Graph, DCTERMS
-from werkzeug.exceptions import NotFound
+import six
+from flask import current_app, has_app_context
+from rdflib import Graph
+from werkzeug.exceptions import BadRequest, NotFound
 
 from app.api.adapter.exceptions import NotModified
 from app.api.adapter.mappings.specification import specification_map
+from app.api.adapter.resources.query import Order, compile_order, compile_select, compile_where, specification_of
+from app.api.adapter.resources.repository import Repository
+from app.api.adapter.resources.resource_service import config_service_resource, get_service_resource
+from app.api.adapter.resources.watcher import create_watcher
 from pyoslc.resources.domains.rm import Requirement
 
 attributes = specification_map
 
+config_service_resource(
+    'csv', Repository,
+    'app.api.adapter.namespaces.rm.csv_requirement_repository', 'CsvRequirementRepository',
+)
 
-def get_requirement(base_url, specification_id):
-    path = 'examples/specifications.csv'
-    if os.path.isfile(path):
-        with open(path, 'r') as f:
-            reader = csv.DictReader(f, delimiter=';')
-            for row in reader:
-                if row['Specification_id'] == specification_id:
-                    about = base_url.replace('selector', 'requirement')
-                    requirement = Requirement(about=about)
-                    requirement.update(row, attributes)
+config_service_resource(
+    'compact', Repository,
+    'app.api.adapter.namespaces.rm.csv_requirement_repository', 'CompactCsvRequirementRepository',
+)
 
-                    return requirement
+config_service_resource(
+    'mmap', Repository,
+    'app.api.adapter.namespaces.rm.csv_requirement_repository', 'MappedCsvRequirementRepository',
+)
 
+config_service_resource(
+    'sharded', Repository,
+    'app.api.adapter.namespaces.rm.sharded_requirement_repository', 'ShardedCsvRequirementRepository',
+)
 
-def get_requirement_list(base_url, select, where):
-    requirements = list()
-    path = 'examples/specifications.csv'
-    if os.path.isfile(path):
-        with open(path, 'r') as f:
-            reader = csv.DictReader(f, delimiter=';')
-            for row in reader:
-                requirement = Requirement()
-                requirement.update(row, attributes=attributes)
-                requirements.append(requirement)
+config_service_resource(
+    'sql', Repository,
+    'app.api.adapter.namespaces.rm.sql_requirement_repository', 'SqlRequirementRepository',
+)
 
-    return requirements
+_repositories = dict()
+_watchers = dict()
 
 
-def get_requirements(base_url):
-    path = 'examples/specifications.csv'
-    requirements = list()
-    with open(path, 'r') as f:
-        reader = csv.DictReader(f, delimiter=';')
+def get_repository(name=None):
+    """
+    Returns the repository instance registered with the name,
+    by default the one configured on REQUIREMENT_REPOSITORY,
+    the instance is shared between requests for keeping
+    the requirements loaded in memory.
+    """
+    config = current_app.config if has_app_context() else dict()
+    if name is None:
+        name = config.get('REQUIREMENT_REPOSITORY', 'csv')
 
-        for row in reader:
-            about = base_url.replace('selector', 'requirement') + '/' + row['Specification_id']
-            requirement = Requirement(about=about)
-            requirement.update(row, attributes=attributes)
-            requirements.append(requirement)
+    repository = _repositories.get(name)
+    if repository is None:
+        repository = get_service_resource(name, Repository)('specifications')
+        watcher = get_watcher(config.get('REQUIREMENT_WATCHER'))
+        if watcher is not None:
+            repository.watch(watcher)
+        _repositories[name] = repository
 
-    return requirements
+    return repository
 
 
-def create_requirement(data):
-    if data:
-        requirement = Requirement()
-        if isinstance(data, Graph):
-            requirement.from_rdf(data, attributes=attributes)
-            identifier = [(s, o) for s, o in data.subject_objects(DCTERMS.identifier)][0]
-            if identifier:
-                requirement.identifier = identifier[1]
-                requirement.about = identifier[0]
+def get_watcher(kind):
+    """
+    Returns the watcher of the files of the repositories,
+    one watcher is started for each kind.
+    """
+    if not kind:
+        return None
+
+    if kind not in _watchers:
+        _watchers[kind] = create_watcher(kind)
+
+    return _watchers[kind]
+
+
+def get_requirement(base_url, specification_id):
+    requirement = get_repository().find(specification_id)
+    if requirement:
+        requirement.about = base_url.replace('selector', 'requirement')
+
+    return requirement
+
+
+def compile_query(select, where, project=None, prefixes=None, order_by=None):
+    """
+    Returns the filter, the compiled where, the selection and the
+    order of the query, the filter is None when no requirement
+    can match, raises QueryError when the where, the select,
+    the order or the prefixes are not valid.
+    """
+    query = compile_where(where, prefixes)
+    selection = compile_select(select, prefixes)
+    order = compile_order(order_by, prefixes)
+    filter = dict(query.filter)
+    if project and filter.setdefault('Project', project) != project or query.empty:
+        filter = None
+
+    return filter, query, selection, order
+
+
+def query_fields(selection, order):
+    # The columns read for the selection and the order
+    if selection.columns is None or order is None:
+        return selection.columns
+
+    return sorted(set(selection.columns) | set(order.columns))
+
+
+def get_requirement_list(base_url, select, where, project=None, prefixes=None, order_by=None):
+    """
+    Returns the requirements matching the oslc.where, of the
+    project when given, with the values of the properties
+    of the oslc.select, in the order of the oslc.orderBy.
+    """
+    filter, query, selection, order = compile_query(select, where, project, prefixes, order_by)
+    if filter is None:
+        return list()
+
+    if order is not None:
+        return get_repository().page(filter or None, None, None, query_fields(selection, order), query.predicate, order)
+
+    return list(get_repository().iter(filter or None, fields=selection.columns, predicate=query.predicate))
+
+
+def get_requirement_page(base_url, select, where, project=None, prefixes=None, after=None, limit=100,
+                         order_by=None, terms=None):
+    """
+    Returns the requirements of the page starting after the
+    cursor given, all of them when the limit is None, the cursor
+    for the next page (None on the last page), the number of
+    requirements of the query (None when counting requires
+    reading them) and the score of each requirement by
+    identifier when searching the terms.
+    """
+    filter, query, selection, order = compile_query(select, where, project, prefixes, order_by)
+    if filter is None:
+        return list(), None, 0, dict()
+
+    repository = get_repository()
+    size = limit + 1 if limit is not None else None
+    if terms:
+        order = order or Order()
+        start = order.after(after, ranked=True) if after is not None else None
+        ranking = repository.rank(terms, filter or None, start, size, query_fields(selection, order),
+                                  query.predicate, order)
+        requirements = [requirement for requirement, _ in ranking]
+        scores = dict((six.text_type(requirement.identifier), score) for requirement, score in ranking)
+    else:
+        start = order.after(after) if order is not None and after is not None else after
+        requirements = repository.page(filter or None, start, size, query_fields(selection, order),
+                                       query.predicate, order)
+        scores = None
+
+    next_after = None
+    if limit is not None and len(requirements) > limit:
+        requirements = requirements[:limit]
+        last = requirements[-1]
+        if terms:
+            next_after = order.cursor(specification_of(last), scores[six.text_type(last.identifier)])
+        elif order is not None:
+            next_after = order.cursor(specification_of(last))
         else:
-            requirement.from_json(data=data, attributes=attributes)
+            next_after = six.text_type(last.identifier)
+
+    total_count = None
+    if query.predicate is None and not terms:
+        total_count = repository.count(filter or None)
+    elif after is None and next_after is None:
+        total_count = len(requirements)
+
+    return requirements, next_after, total_count, scores
+
+
+def count_requirements(where, project=None, prefixes=None, terms=None):
+    """
+    Returns the number of requirements of the query, counted
+    by the repository without reading the requirements.
+    """
+    filter, query, _, _ = compile_query(None, where, project, prefixes)
+    if filter is None:
+        return 0
+
+    return get_repository().count(filter or None, query.predicate, terms or None)
+
+
+def get_requirements(base_url, terms=None, fields=None, after=None, limit=None):
+    """
+    Returns the requirements for the selection dialog, the ones
+    containing the words of the terms when given, ordered by
+    identifier starting after the identifier given, and the
+    identifier for the next page, None on the last page.
+    """
+    repository = get_repository()
+    size = limit + 1 if limit is not None else None
+    if terms:
+        found = list(itertools.islice(repository.search(terms, fields, after), size))
+    else:
+        found = repository.page(after=after, limit=size, fields=fields)
+
+    next_after = None
+    if limit is not None and len(found) > limit:
+        found = found[:limit]
+        next_after = six.text_type(found[-1].identifier)
 
-        specification = requirement.to_mapped_object(attributes)
+    requirements = list()
+    for requirement in found:
+        requirement.about = base_url.replace('selector', 'requirement') + '/' + requirement.identifier
+        requirements.append(requirement)
 
-        if specification:
-            path = 'examples/specifications.csv'
-            tempfile = NamedTemporaryFile(mode='w', delete=False)
+    return requirements, next_after
 
-            with open(path, 'r') as f:
-                reader = csv.DictReader(f, delimiter=';')
-                field_names = reader.fieldnames
 
-            with open(path, 'r') as csvfile, tempfile:
-                reader = csv.DictReader(csvfile, fieldnames=field_names, delimiter=';')
-                writer = csv.DictWriter(tempfile, fieldnames=field_names, delimiter=';')
-                exist = False
+def read_requirement(data):
+    """
+    Returns the requirement of the json data or of the graph,
+    a BadRequest when the graph has more than one requirement.
+    """
+    if isinstance(data, Graph):
+        requirements = Requirement.list_from_rdf(data, attributes)
+        if len(requirements) > 1:
+            return BadRequest('Only one requirement can be sent, the graph has {}'.format(len(requirements)))
 
-                for row in reader:
-                    if row['Specification_id'] == specification['Specification_id']:
-                        exist = True
-                    writer.writerow(row)
+        return requirements[0] if requirements else Requirement()
 
-                if not exist:
-                    writer.writerow(specification)
+    requirement = Requirement()
+    requirement.from_json(data=data, attributes=attributes)
+    return requirement
 
-            shutil.move(tempfile.name, path)
 
-            if exist:
+def create_requirement(data):
+    if data:
+        requirement = read_requirement(data)
+        if not isinstance(requirement, Requirement):
+            return requirement
+
+        specification = requirement.to_mapped_object(attributes)
+
+        if specification:
+            if not get_repository().create(specification):
                 return NotModified()
 
             return requirement
@@ -104,42 +255,14 @@ def create_requirement(data):
 
 def update_requirement(requirement_id, data):
     if data:
-        requirement = Requirement()
-        if isinstance(data, Graph):
-            requirement.from_rdf(data, attributes=attributes)
-            identifier = [(s, o) for s, o in data.subject_objects(DCTERMS.identifier)][0]
-            if identifier:
-                requirement.identifier = identifier[1]
-                requirement.about = identifier[0]
-        else:
-            requirement.from_json(data=data, attributes=attributes)
+        requirement = read_requirement(data)
+        if not isinstance(requirement, Requirement):
+            return requirement
 
         specification = requirement.to_mapped_object(attributes)
 
         if specification:
-            path = 'examples/specifications.csv'
-            tempfile = NamedTemporaryFile(mode='w', delete=False)
-
-            with open(path, 'r') as f:
-                reader = csv.DictReader(f, delimiter=';')
-                field_names = reader.fieldnames
-
-            modified = False
-            with open(path, 'r') as csvfile, tempfile:
-                reader = csv.DictReader(csvfile, fieldnames=field_names, delimiter=';')
-                writer = csv.DictWriter(tempfile, fieldnames=field_names, delimiter=';')
-                for row in reader:
-                    if row['Specification_id'] == str(requirement_id):
-                        rq = Requirement()
-                        rq.from_json(specification, attributes=attributes)
-                        row = rq.to_mapped_object(attributes=attributes)
-                        row['Specification_id'] = requirement_id
-                        modified = True
-                    writer.writerow(row)
-
-            shutil.move(tempfile.name, path)
-
-            if not modified:
+            if not get_repository().update(str(requirement_id), specification):
                 raise NotModified()
 
             return requirement
@@ -149,26 +272,7 @@ def update_requirement(requirement_id, data):
 
 
 def delete_requirement(requirement_id):
-    path = 'examples/specifications.csv'
-    tempfile = NamedTemporaryFile(mode='w', delete=False)
-
-    with open(path, 'r') as f:
-        reader = csv.DictReader(f, delimiter=';')
-        field_names = reader.fieldnames
-
-    modified = False
-    with open(path, 'r') as csvfile, tempfile:
-        reader = csv.DictReader(csvfile, fieldnames=field_names, delimiter=';')
-        writer = csv.DictWriter(tempfile, fieldnames=field_names, delimiter=';')
-        for row in reader:
-            if row['Specification_id'] != str(requirement_id):
-                writer.writerow(row)
-            else:
-                modified = True
-
-    shutil.move(tempfile.name, path)
-
-    if not modified:
+    if not get_repository().delete(str(requirement_id)):
         return NotModified()
 
     return True
@@ -1,11 +1,12 @@
 import logging
 from datetime import datetime
-from six.moves.urllib.parse import urlparse
+from six.moves.urllib.parse import urlencode, urlparse
 from xml.sax import SAXParseException
 
-from flask import request, make_response, url_for, render_template
+import six
+from flask import Response, request, make_response, url_for, render_template
 from flask_restx import Namespace
-from rdflib import Graph
+from rdflib import Graph, Literal, URIRef
 from rdflib.plugin import register
 from rdflib.serializer import Serializer
 from werkzeug.exceptions import UnsupportedMediaType, NotAcceptable, PreconditionFailed, NotFound, BadRequest
@@ -13,18 +14,24 @@ from werkzeug.http import http_date
 
 from app.api.adapter import api
 from app.api.adapter.namespaces.business import get_requirement_list, get_requirement, attributes, create_requirement, \
-    update_requirement, delete_requirement
-from app.api.adapter.namespaces.rm.csv_requirement_repository import CsvRequirementRepository
+    update_requirement, delete_requirement, get_repository, get_requirement_page, count_requirements
 from app.api.adapter.namespaces.rm.parsers import specification_parser
+from app.api.adapter.resources.cache import LRUCache
+from app.api.adapter.resources.query import compile_select
 from app.api.adapter.resources.resource_service import config_service_resource
 from app.api.adapter.services.providers import ServiceProviderCatalogSingleton, RootServiceSingleton, PublisherSingleton
 from app.api.adapter.services.specification import ServiceResource
+from pyoslc.query import QueryError, normalize
 from pyoslc.resources.domains.rm import Requirement
 from pyoslc.resources.models import ResponseInfo, Compact, Preview
+from pyoslc.vocabularies.core import OSLC
 from pyoslc.rest.resource import OslcResource
 
 logger = logging.getLogger(__name__)
 
+# Serialized results of the queries by request, up to 64 MB of bodies
+_results = LRUCache(256, maxbytes=64 * 1024 * 1024, size=lambda result: len(result[2]))
+
 adapter_ns = Namespace(name='adapter', description='Python OSLC Adapter', path='/services',)
 
 register(
@@ -92,28 +99,122 @@ class ServiceProvider(OslcResource):
 @api.representation('text/turtle')
 class ResourceOperation(OslcResource):
 
+    # Requirements on each page when the
+    # paging is requested without a size
+    page_size = 100
+
+    # Parameters compared by their tokens on the key of the results
+    query_parameters = ('oslc.where', 'oslc.select', 'oslc.orderBy', 'oslc.prefix')
+
+    # Headers of the responses kept on the cache of the results
+    cached_headers = ('Accept', 'Content-Type', 'OSLC-Core-Version', 'ETag')
+
     def get(self, service_provider_id):
+        """
+        Returns the results of the query, the serialized results are
+        kept on a cache while the version of the repository is the
+        same, and answered as not modified for the same ETag.
+        """
         super(ResourceOperation, self).get()
 
+        key = self.cache_key(service_provider_id)
+        repository = get_repository()
+        version = repository.current_version() if key is not None else None
+
+        cached = _results.get(key) if version is not None else None
+        if cached is not None and cached[0] is repository and cached[1] == version:
+            response = make_response(cached[2], 200)
+            for name, value in cached[3]:
+                # Replacing the Content-Type set by make_response
+                response.headers[name] = value
+        else:
+            response = self.query(service_provider_id)
+            if version is not None and isinstance(response, Response) and response.status_code == 200:
+                headers = [(name, response.headers[name]) for name in self.cached_headers if name in response.headers]
+                _results.put(key, (repository, version, response.get_data(), headers))
+
+        if isinstance(response, Response):
+            response.make_conditional(request)
+
+        return response
+
+    def cache_key(self, service_provider_id):
+        """
+        Returns the key of the results of the request, None
+        when the query can not be read.
+        """
+        parameters = list()
+        for name in sorted(request.args):
+            values = request.args.getlist(name)
+            try:
+                if name in self.query_parameters:
+                    values = [normalize(value) for value in values]
+            except QueryError:
+                return None
+            parameters.append((name, tuple(values)))
+
+        return (service_provider_id, request.url_root, tuple(parameters),
+                request.headers.get('accept'), request.headers.get('content-type'))
+
+    def query(self, service_provider_id):
         select = request.args.get('oslc.select', '')
         where = request.args.get('oslc.where', '')
+        order_by = request.args.get('oslc.orderBy', '')
+        terms = request.args.get('oslc.searchTerms', '')
 
         endpoint_url = url_for('{}.{}'.format(request.blueprint, self.endpoint),
                                service_provider_id=service_provider_id)
         base_url = '{}{}'.format(request.url_root.rstrip('/'), endpoint_url)
 
-        data = get_requirement_list(base_url, select, where)
-        if len(data) == 0:
+        prefixes = request.args.get('oslc.prefix', '')
+        paging = request.args.get('oslc.paging') == 'true' or 'oslc.pageSize' in request.args
+        after = request.args.get('after')
+        try:
+            page_size = request.args.get('oslc.pageSize', str(self.page_size)) if paging else None
+            if page_size is not None and not page_size.isdigit():
+                raise QueryError('The page size must be a number: {}'.format(page_size))
+
+            if page_size == '0':
+                # Only the count is requested
+                data, next_after, scores = list(), None, None
+                total_count = count_requirements(where, project=service_provider_id, prefixes=prefixes, terms=terms)
+            elif paging or terms:
+                data, next_after, total_count, scores = get_requirement_page(
+                    base_url, select, where, project=service_provider_id, prefixes=prefixes,
+                    after=after, limit=int(page_size) if page_size else None, order_by=order_by, terms=terms)
+            else:
+                data = get_requirement_list(base_url, select, where, project=service_provider_id, prefixes=prefixes,
+                                            order_by=order_by)
+                next_after, total_count, scores = None, len(data), None
+
+            selection = compile_select(select, prefixes)
+        except QueryError as e:
+            return make_response('Invalid query: {}'.format(e), 400)
+
+        if len(data) == 0 and not where and not after and not terms and page_size != '0':
             return make_response('No resources form provider with ID {}'.format(service_provider_id), 404)
 
         response_info = ResponseInfo(base_url)
-        response_info.total_count = len(data)
+        if total_count is not None:
+            response_info.total_count = total_count
         response_info.title = 'Query Results for Requirements'
 
+        if next_after is not None:
+            args = request.args.to_dict()
+            args.update({'oslc.paging': 'true', 'after': next_after})
+            response_info.next_page = base_url + '?' + urlencode(sorted(args.items()))
+
         response_info.members = data
         response_info.to_rdf(self.graph)
 
-        return self.create_response(graph=self.graph)
+        if select:
+            for requirement in data:
+                requirement.to_rdf(self.graph, base_url, attributes, selection.properties)
+
+        for identifier, score in six.iteritems(scores or dict()):
+            self.graph.add((URIRef(base_url + '/' + identifier), OSLC.score, Literal(score)))
+
+        return self.create_response(graph=self.graph, etag=True)
 
     # @adapter_ns.expect(specification)
     def post(self, service_provider_id):
@@ -214,7 +315,7 @@ class ResourcePreview(OslcResource):
 
         etag = request.headers.get(key='If-Match', default=None, type=str)
 
-        rq = CsvRequirementRepository('specs')
+        rq = get_repository()
         r = rq.find(requirement_id)
         r.about = base_url
 
@@ -243,7 +344,7 @@ class ResourcePreview(OslcResource):
             return make_response(req.description, req.code)
 
     def delete(self, service_provider_id, requirement_id):
-        rq = CsvRequirementRepository('specs')
+        rq = get_repository()
         r = rq.find(requirement_id)
 
         if r:
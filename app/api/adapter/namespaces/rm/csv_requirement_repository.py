@@ -1,9 +1,40 @@
 import csv
+import hashlib
+import itertools
+import logging
+import mmap
 import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from operator import itemgetter
+from tempfile import NamedTemporaryFile
 
-from app.api.adapter.resources.repository import Repository
+import six
+from six.moves import cPickle as pickle
+
+from app.api.adapter.resources.columns import ColumnTable
+from app.api.adapter.resources.journal import Journal, replace
+from app.api.adapter.resources.query import Order
+from app.api.adapter.resources.repository import Repository, ranked, top
+from app.api.adapter.resources.text import TextIndex
 from pyoslc.resources.domains.rm import Requirement
 
+logger = logging.getLogger(__name__)
+
+
+class CommitGroup(object):
+    """
+    Records of the writes waiting to be written
+    together on the journal.
+    """
+
+    def __init__(self):
+        self.records = list()
+        self.done = False
+        self.error = None
+
 
 class CsvRequirementRepository(Repository):
 
@@ -30,64 +61,688 @@ class CsvRequirementRepository(Repository):
         'Project': {'attribute': '_BaseResource__subject', 'oslc_property': 'DCTERMS.subject'},
     }
 
-    def __init__(self, title):
-        # self.csv_file_path = csv_file_path
+    # Number of records written on the journal
+    # before moving them into the csv file.
+    compact_threshold = 1000
+
+    # Seconds waited by the writer of a group for collecting
+    # the records of other concurrent writes.
+    commit_delay = 0.0
+
+    # Whether the parsed rows and their indexes are stored on a
+    # snapshot file next to the csv file, read instead of
+    # parsing the csv file while it does not change.
+    cache_snapshot = True
+    snapshot_format = 3
+
+    # Fields with an index of the requirements by value,
+    # used for answering the filters by equality.
+    indexed = ('Product', 'Project', 'Source', 'Author', 'Category', 'Discipline',
+               'Revision', 'Target_Value', 'Degree_of_fulfillment', 'Status')
+
+    # Fields with the words used by the search
+    searchable = ('Specification_id', 'Title', 'Description')
+
+    def __init__(self, title, csv_file_path=None):
         super(CsvRequirementRepository, self).__init__(title)
-        self.csv_file_path = os.path.join(
+        self.csv_file_path = csv_file_path or os.path.join(
             os.path.abspath(''), 'examples', 'specifications.csv')
+        self.journal = Journal(self.csv_file_path + '.journal')
+        self.snapshot_path = self.csv_file_path + '.snapshot'
 
-    def find(self, requirement_id):
-        requirement = None
+        self.field_names = None
+        self.rows = OrderedDict()
+        self._signature = None
+        self._journal_offset = 0
+        self._journal_records = 0
+        self._indexes = None
+        self._text_index = None
+        self._ids = None
+        self._watched = False
+        self._stale = True
+        self.version = 0
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._compaction = None
+        self._group = None
+        self._writing = None
+        self._write_lock = threading.Lock()
+
+    def signature(self):
+        """
+        Returns the values used for detecting whether the
+        file was changed since it was loaded, None if the
+        file does not exist.
+        """
+        try:
+            st = os.stat(self.csv_file_path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime
+
+    def watch(self, watcher):
+        """
+        Uses the watcher for knowing when the files were changed,
+        the files are not checked on each load while the
+        watcher does not notify a change.
+        """
+        watcher.add(self.csv_file_path, self._changed_on_disk)
+        watcher.add(self.journal.path, self._changed_on_disk)
+        self._watched = True
+
+    def _changed_on_disk(self, path):
+        self._stale = True
+
+    def load(self):
+        """
+        Loads the rows of the csv file into memory, keyed by
+        the Specification_id, and applies the changes written
+        on the journal, the files are read again only when
+        they were changed on disk.
+        """
+        if self._watched and not self._stale:
+            return self.rows
+
+        self._stale = False
+        signature = self.signature()
+        journal_size = self.journal.size()
+        if signature == self._signature and journal_size == self._journal_offset:
+            return self.rows
+
+        with self._lock:
+            signature = self.signature()
+            journal_size = self.journal.size()
+            if signature != self._signature or journal_size < self._journal_offset:
+                self._load_snapshot(signature)
+
+            if journal_size != self._journal_offset:
+                for offset, record in self.journal.replay(self._journal_offset):
+                    self._apply(record)
+                    self._journal_offset = offset
+                    self._journal_records += 1
+
+                # The writes not yet on the journal are newer
+                # than any of the records replayed
+                for group in (self._writing, self._group):
+                    for record in group.records if group is not None else ():
+                        self._apply(record)
+
+        return self.rows
+
+    def _load_snapshot(self, signature):
+        if self._signature is None:
+            self.journal.recover()
+
+        cached = self._read_cache(signature) if signature is not None and self.cache_snapshot else None
+        if cached is not None:
+            rows, field_names, self._indexes, self._text_index, self._ids = cached
+        else:
+            # The indexes are built on the first use when the file does not give them
+            self._indexes = self._text_index = self._ids = None
+            rows, field_names = self._read_snapshot(signature) if signature is not None else (OrderedDict(), None)
+
+        self.rows, self.field_names, self._signature = rows, field_names, signature
+        self._journal_offset = 0
+        self._journal_records = 0
+        self.version += 1
+
+        if cached is None and signature is not None and self.cache_snapshot:
+            self._build_indexes(six.itervalues(self.rows))
+            self._write_cache(signature)
+
+    def current_version(self):
+        with self._lock:
+            self.load()
+            return self.version
+
+    def mapping_version(self):
+        """
+        Returns the hash of the settings used for parsing and
+        indexing the rows, a snapshot written with other
+        settings is not used.
+        """
+        settings = (self.snapshot_format, type(self).__name__, sorted(self.indexed), list(self.searchable),
+                    sorted((key, sorted(value.items())) for key, value in six.iteritems(self.specification_map)))
+        return hashlib.md5(repr(settings).encode('utf-8')).hexdigest()
+
+    def _read_cache(self, signature):
+        """
+        Returns the rows and the indexes of the snapshot, None when
+        it can not be used, the snapshot is only a cache so a damaged
+        snapshot, or one written by other versions of the classes,
+        is ignored whatever the error.
+        """
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+
+            if snapshot.get('signature') != signature or snapshot.get('mapping') != self.mapping_version():
+                return None
+
+            return (snapshot['rows'], snapshot['field_names'], snapshot['indexes'], snapshot['text_index'],
+                    snapshot['ids'])
+        except Exception:
+            return None
+
+    def _write_cache(self, signature):
+        snapshot = {
+            'signature': signature,
+            'mapping': self.mapping_version(),
+            'rows': self.rows,
+            'field_names': self.field_names,
+            'indexes': self._indexes,
+            'text_index': self._text_index,
+            'ids': self._ids,
+        }
+
+        tempfile = None
+        try:
+            tempfile = NamedTemporaryFile(mode='wb', dir=os.path.dirname(self.snapshot_path), delete=False)
+            with tempfile:
+                pickle.dump(snapshot, tempfile, pickle.HIGHEST_PROTOCOL)
+            replace(tempfile.name, self.snapshot_path)
+        except (OSError, IOError) as e:
+            # The rows are loaded anyway, only the next loads are slower
+            logger.warning('The snapshot {} could not be written: {}'.format(self.snapshot_path, e))
+            if tempfile is not None and os.path.exists(tempfile.name):
+                os.remove(tempfile.name)
+
+    def _read_snapshot(self, signature):
+        rows = OrderedDict()
         with open(self.csv_file_path, 'r') as f:
             reader = csv.DictReader(f, delimiter=';')
             for row in reader:
-                if row['Specification_id'] == requirement_id:
-                    requirement = Requirement()
-                    requirement.update(row, attributes=self.specification_map)
-                    break
-        return requirement
+                rows[row['Specification_id']] = row
 
-    def create(self, requirement):
-        with open(self.csv_file_path, 'a') as f:
-            fieldnames = list(CsvRequirementRepository.specification_map.keys())
-            writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=';')
-            writer.writerow(
-                CsvRequirementRepository.requirement_to_dict(requirement))
+        return rows, reader.fieldnames
 
-    def read(self):
-        with open(self.csv_file_path, 'rb') as f:
-            reader = csv.DictReader(f, delimiter=';')
-            for row in reader:
-                yield CsvRequirementRepository.read_requirement(row)
-
-    def delete(self, requirement):
-        temp_csv_file_path = 'temp_' + self.csv_file_path
-        with open(self.csv_file_path, 'rb') as file, open(temp_csv_file_path, 'wb') as new_file:
-            fieldnames = list(CsvRequirementRepository.specification_map.keys())
-            writer = csv.DictWriter(
-                new_file, fieldnames=fieldnames, delimiter=';')
-            for row in csv.reader(file):
-                if requirement.identifier != CsvRequirementRepository.read_requirement(row).identifier:
-                    writer.writerow(row)
-
-        os.remove(self.csv_file_path)
-        os.rename(temp_csv_file_path, self.csv_file_path)
-
-    def update(self, requirement):
-        temp_csv_file_path = 'temp_' + self.csv_file_path
-        with open(self.csv_file_path, 'rb') as file, open(temp_csv_file_path, 'wb') as new_file:
-            fieldnames = list(CsvRequirementRepository.specification_map.keys())
-            writer = csv.DictWriter(
-                new_file, fieldnames=fieldnames, delimiter=';')
-            for row in csv.reader(file):
-                if requirement.identifier == CsvRequirementRepository.read_requirement(row).identifier:
-                    writer.writerow(
-                        CsvRequirementRepository.requirement_to_dict(requirement))
+    def _apply(self, record):
+        self.version += 1
+        previous = None
+        if self._indexes is not None:
+            previous = self._current_row(record['id'])
+            self._remove_from_indexes(record['id'], previous)
+
+        if record['op'] == 'delete':
+            self.rows.pop(record['id'], None)
+            if previous is not None:
+                del self._ids[bisect_left(self._ids, record['id'])]
+        else:
+            self.rows[record['id']] = record['row']
+            if self._indexes is not None:
+                self._add_to_indexes(record['id'], record['row'])
+                if previous is None:
+                    insort(self._ids, record['id'])
+
+    def _current_row(self, requirement_id):
+        # The row before applying a record, without loading the files
+        return self.rows.get(requirement_id)
+
+    def _add_to_indexes(self, requirement_id, row):
+        for name, index in six.iteritems(self._indexes):
+            index.setdefault(row.get(name), set()).add(requirement_id)
+
+        self._text_index.add(requirement_id, [row.get(name) for name in self.searchable])
+
+    def _remove_from_indexes(self, requirement_id, row):
+        if row is None:
+            return
+
+        self._text_index.remove(requirement_id)
+
+        for name, index in six.iteritems(self._indexes):
+            ids = index.get(row.get(name))
+            if ids is not None:
+                ids.discard(requirement_id)
+                if not ids:
+                    del index[row.get(name)]
+
+    def indexes(self):
+        """
+        Returns the indexes of the requirement ids by the value of
+        each indexed field, the indexes, the text index and the
+        sorted ids are built on the first use and kept up to
+        date with the journal records.
+        """
+        with self._lock:
+            self.load()
+            if self._indexes is None:
+                self._build_indexes(self.iter_rows())
+
+            return self._indexes
+
+    def _build_indexes(self, rows):
+        self._indexes = dict((name, dict()) for name in self.indexed)
+        self._text_index = TextIndex()
+        ids = list()
+        for row in rows:
+            self._add_to_indexes(row['Specification_id'], row)
+            ids.append(row['Specification_id'])
+
+        ids.sort()
+        self._ids = ids
+
+    def select(self, filter):
+        """
+        Returns the ids of the requirements matching the values of the
+        indexed fields of the filter, None when the filter does not
+        use any indexed field.
+        """
+        with self._lock:
+            indexes = self.indexes()
+            groups = [indexes[key].get(value, set()) for key, value in six.iteritems(filter) if key in indexes]
+            if not groups:
+                return None
+
+            groups.sort(key=len)
+            ids = set(groups[0])
+            for group in groups[1:]:
+                ids &= group
+
+            return ids
+
+    def _commit(self, records):
+        """
+        Applies the records to the rows and adds them to the group
+        of records waiting to be written on the journal, must be
+        called holding the lock, the group returned is written
+        by calling _write after releasing the lock.
+        """
+        for record in records:
+            self._apply(record)
+
+        if self._group is None:
+            self._group = CommitGroup()
+        self._group.records.extend(records)
+
+        return self._group
+
+    def _write(self, group):
+        """
+        Writes the group on the journal with the records of the
+        writes done while the previous group was written, so
+        the concurrent writes share one append and one fsync.
+
+        The records written by other processes in the
+        meantime are applied on the next load.
+        """
+        with self._write_lock:
+            if not group.done:
+                if self.commit_delay:
+                    time.sleep(self.commit_delay)
+
+                with self._lock:
+                    group, self._group = self._group, None
+                    self._writing = group
+
+                try:
+                    start, end = self.journal.append(group.records)
+                except Exception as e:
+                    group.error = e
+                    with self._lock:
+                        # The rows are loaded again from the files
+                        self._signature = None
+                        self._stale = True
+                        self._writing = None
                 else:
-                    writer.writerow(row)
+                    with self._lock:
+                        self._writing = None
+                        if start == self._journal_offset:
+                            self._journal_offset = end
+                            self._journal_records += len(group.records)
+
+                        if self._journal_records >= self.compact_threshold:
+                            self.schedule_compaction()
+                finally:
+                    group.done = True
+
+        if group.error is not None:
+            raise group.error
+
+    def _row(self, specification):
+        field_names = self.field_names or list(specification.keys())
+        row = dict()
+        for name in field_names:
+            value = specification.get(name, '')
+            row[name] = value if isinstance(value, six.string_types) else str(value)
+
+        return row
+
+    def get_row(self, requirement_id):
+        return self.load().get(requirement_id)
+
+    def iter_rows(self):
+        """
+        Returns an iterator over the rows at the current
+        state of the repository, in the order of the file.
+        """
+        with self._lock:
+            return iter(list(self.load().values()))
+
+    def _rows(self, ids):
+        # The file is loaded once for reading the rows of all the ids
+        with self._lock:
+            self.load()
+            return [self._current_row(requirement_id) for requirement_id in ids]
+
+    def to_requirement(self, row, fields=None):
+        if fields:
+            row = dict((key, row.get(key)) for key in set(fields) | {'Specification_id'})
+
+        requirement = Requirement()
+        requirement.update(row, attributes=self.specification_map)
+        return requirement
+
+    def find(self, requirement_id):
+        row = self.get_row(requirement_id)
+        return self.to_requirement(row) if row is not None else None
+
+    def find_many(self, requirement_ids):
+        return [self.to_requirement(row) for row in self._rows(list(requirement_ids)) if row is not None]
+
+    def iter(self, filter=None, fields=None, predicate=None):
+        """
+        Yields the requirements in the order of the file, when the
+        filter uses an indexed field only the matching rows are
+        read, ordered by identifier.
+        """
+        if filter:
+            with self._lock:
+                rows = self._rows(sorted(self.select(filter)))
+        else:
+            rows = self.iter_rows()
+
+        for row in rows:
+            if row is None or filter and any(row.get(key) != value for key, value in six.iteritems(filter)):
+                continue
+
+            if predicate is not None and not predicate(row):
+                continue
+
+            yield self.to_requirement(row, fields)
+
+    def page(self, filter=None, after=None, limit=100, fields=None, predicate=None, order=None):
+        """
+        Returns the page reading the sorted ids from the cursor, the
+        ids selected by the indexes are sorted instead when they are
+        a few of the requirements, so the rows read for a page do
+        not depend on the number of requirements.
+
+        When the first key of the order has an index the ids are read
+        by groups in the order of the values, until the page is full.
+        """
+        with self._lock:
+            self.indexes()
+            selected = self.select(filter) if filter else None
+            if order is None:
+                return self._page_by_id(filter, selected, after, limit, fields, predicate)
+
+            if order.columns == ['Specification_id']:
+                descending = order.keys[0][1]
+                after = after and (after[0].key if descending else after[0])
+                return self._page_by_id(filter, selected, after, limit, fields, predicate, descending)
+
+            return self._page_by_order(filter, selected, after, limit, fields, predicate, order)
+
+    def _matches(self, row, filter, predicate):
+        if row is None or filter and any(row.get(key) != value for key, value in six.iteritems(filter)):
+            return False
+
+        return predicate is None or predicate(row)
+
+    def _page_by_id(self, filter, selected, after, limit, fields, predicate, descending=False):
+        if selected is not None and len(selected) * 8 < len(self._ids):
+            ids = sorted((requirement_id for requirement_id in selected
+                          if after is None or (requirement_id < after if descending else requirement_id > after)),
+                         reverse=descending)
+            positions = six.moves.range(len(ids))
+        elif descending:
+            ids = self._ids
+            positions = six.moves.range((bisect_left(ids, after) if after is not None else len(ids)) - 1, -1, -1)
+        else:
+            ids = self._ids
+            positions = six.moves.range(bisect_right(ids, after) if after is not None else 0, len(ids))
+
+        requirements = list()
+        for position in positions:
+            if limit is not None and len(requirements) >= limit:
+                break
+
+            requirement_id = ids[position]
+            if selected is not None and requirement_id not in selected:
+                continue
+
+            row = self._current_row(requirement_id)
+            if self._matches(row, filter, predicate):
+                requirements.append(self.to_requirement(row, fields))
+
+        return requirements
+
+    def _page_by_order(self, filter, selected, after, limit, fields, predicate, order):
+        column = order.keys[0][0]
+        index = self._indexes.get(column)
+        if index is None:
+            groups = [selected if selected is not None else self._ids]
+        else:
+            def first(value):
+                return order.component(0, value)
+
+            # The values with the same first key, e.g. "1" and "1.0", make one group
+            values = [value for value in sorted(index, key=first) if after is None or not first(value) < after[0]]
+            groups = (set().union(*[index[value] for value in same]) for _, same in itertools.groupby(values, first))
+            if selected is not None:
+                groups = (ids & selected for ids in groups)
+
+        found = list()
+        for ids in groups:
+            rows = (self._current_row(requirement_id) for requirement_id in ids)
+            keyed = ((order.key(row), row) for row in rows if self._matches(row, filter, predicate))
+            keyed = (item for item in keyed if after is None or item[0] > after)
+            if limit is None:
+                # The groups come in the order of the first key,
+                # so each group is sorted only by the other keys
+                found.extend(top(keyed, None, key=itemgetter(0)))
+            else:
+                found = top(itertools.chain(found, keyed), limit, key=itemgetter(0))
 
-        os.remove(self.csv_file_path)
-        os.rename(temp_csv_file_path, self.csv_file_path)
+            # The groups left have greater values of the first key
+            if index is not None and limit is not None and len(found) >= limit:
+                break
+
+        return [self.to_requirement(row, fields) for _, row in found]
+
+    def search(self, terms, fields=None, after=None):
+        """
+        Yields the requirements found on the text index, ordered
+        by identifier starting after the identifier given.
+        """
+        with self._lock:
+            self.indexes()
+            ids = self._text_index.search(terms)
+            rows = self._rows(sorted(i for i in ids if after is None or i > after))
+
+        for row in rows:
+            if row is not None:
+                yield self.to_requirement(row, fields)
+
+    def text_statistics(self, terms):
+        """
+        Returns the statistics of the text index for the terms.
+        """
+        with self._lock:
+            self.indexes()
+            return self._text_index.statistics(terms)
+
+    def rank(self, terms, filter=None, after=None, limit=100, fields=None, predicate=None, order=None,
+             statistics=None):
+        """
+        Returns the ranking of the ids found on the text index, the
+        statistics of the text index of other repositories can be
+        given for scoring the requirements as one collection.
+        """
+        order = order or Order()
+        with self._lock:
+            self.indexes()
+            ids = self._text_index.search(terms)
+            selected = self.select(filter) if filter else None
+            if selected is not None:
+                ids &= selected
+
+            scores = self._text_index.scores(terms, ids, statistics)
+            rows = ((score, self._current_row(requirement_id)) for requirement_id, score in six.iteritems(scores))
+            items = ((score, row, row) for score, row in rows if self._matches(row, filter, predicate))
+
+            return [(self.to_requirement(row, fields), score) for row, score in ranked(items, after, limit, order)]
+
+    def count(self, filter=None, predicate=None, terms=None):
+        """
+        Returns the number of ids of the indexes when they answer the
+        filter and the terms, otherwise the rows selected by them
+        are checked, no requirement is created for counting.
+        """
+        if not filter and predicate is None and not terms:
+            return len(self.load())
+
+        with self._lock:
+            self.indexes()
+            ids = self.select(filter) if filter else None
+            if terms:
+                found = self._text_index.search(terms)
+                ids = found if ids is None else found & ids
+
+            if ids is not None:
+                if predicate is None and all(key in self.indexed for key in filter or ()):
+                    return len(ids)
+
+                return sum(1 for requirement_id in ids
+                           if self._matches(self._current_row(requirement_id), filter, predicate))
+
+        return sum(1 for row in self.iter_rows() if self._matches(row, filter, predicate))
+
+    def create(self, specification):
+        """
+        Adds the specification (the mapped object of the requirement)
+        returns False when the Specification_id already exists.
+        """
+        with self._lock:
+            identifier = specification['Specification_id']
+            if self.get_row(identifier) is not None:
+                return False
+
+            group = self._commit([{'op': 'create', 'id': identifier, 'row': self._row(specification)}])
+
+        self._write(group)
+        return True
+
+    def update(self, requirement_id, specification):
+        with self._lock:
+            if self.get_row(requirement_id) is None:
+                return False
+
+            row = self._row(specification)
+            row['Specification_id'] = requirement_id
+            group = self._commit([{'op': 'update', 'id': requirement_id, 'row': row}])
+
+        self._write(group)
+        return True
+
+    def delete(self, requirement_id):
+        with self._lock:
+            if self.get_row(requirement_id) is None:
+                return False
+
+            group = self._commit([{'op': 'delete', 'id': requirement_id}])
+
+        self._write(group)
+        return True
+
+    def bulk_upsert(self, specifications):
+        """
+        Adds or replaces the specifications writing them as one
+        group of records on the journal, returns the number
+        of specifications written.
+        """
+        with self._lock:
+            self.load()
+            records = [{'op': 'upsert', 'id': specification['Specification_id'], 'row': self._row(specification)}
+                       for specification in specifications]
+            group = self._commit(records) if records else None
+
+        if group is not None:
+            self._write(group)
+        return len(records)
+
+    def bulk_delete(self, requirement_ids):
+        with self._lock:
+            requirement_ids = list(set(requirement_ids))
+            records = [{'op': 'delete', 'id': requirement_id}
+                       for requirement_id, row in zip(requirement_ids, self._rows(requirement_ids)) if row is not None]
+            group = self._commit(records) if records else None
+
+        if group is not None:
+            self._write(group)
+        return len(records)
+
+    def schedule_compaction(self):
+        if self._compaction is None or not self._compaction.is_alive():
+            self._compaction = threading.Thread(target=self.compact, name='compaction-' + self.title)
+            self._compaction.daemon = True
+            self._compaction.start()
+
+    def compact(self):
+        """
+        Writes the rows into a new version of the csv file and
+        removes the applied records from the journal, the file
+        is replaced in one step so the readers never see
+        a partially written file.
+        """
+        with self._compaction_lock:
+            with self._lock:
+                if self._group is not None or self._writing is not None:
+                    # The rows have changes not written on the journal yet
+                    return
+
+                rows = self._compaction_rows()
+                field_names = self.field_names
+                signature = self._signature
+                offset = self._journal_offset
+                records = self._journal_records
+
+            if not offset or not field_names:
+                return
+
+            tempfile = NamedTemporaryFile(mode='w', dir=os.path.dirname(self.csv_file_path), delete=False)
+            with tempfile:
+                writer = csv.DictWriter(tempfile, fieldnames=field_names, delimiter=';')
+                writer.writeheader()
+                writer.writerows(rows)
+                tempfile.flush()
+                os.fsync(tempfile.fileno())
+
+            with self._lock, self.journal.locked():
+                if self.signature() != signature:
+                    # The file was modified by someone else,
+                    # the journal is applied on the new file.
+                    os.remove(tempfile.name)
+                    return
+
+                replace(tempfile.name, self.csv_file_path)
+                self.journal.discard(offset)
+                self._journal_offset -= offset
+                self._journal_records -= records
+                self._compacted(self.signature())
+
+    def _compaction_rows(self):
+        """
+        Returns the rows written by the compaction, taken under the
+        lock together with the offset of the journal, the rows can
+        not change while the new file is written.
+        """
+        return list(self.iter_rows())
+
+    def _compacted(self, signature):
+        # The rows in memory are already the content of the new file
+        self._signature = signature
 
     @staticmethod
     def requirement_to_dict(requirement):
@@ -117,3 +772,256 @@ class CsvRequirementRepository(Repository):
                         attr.add(v if v != '' else 'Empty')
                     else:
                         setattr(requirement, attribute, v)
+
+
+class CompactCsvRequirementRepository(CsvRequirementRepository):
+    """
+    Repository for keeping the rows of the csv file in memory
+    using one column per field, the fields with a few distinct
+    values are stored as codes of a dictionary of the values,
+    the requirements are created only when they are read.
+    """
+
+    # Fields repeating the same values on most of the rows
+    categorical = ('Product', 'Project', 'Source', 'Author', 'Category', 'Discipline',
+                   'Revision', 'Target_Value', 'Degree_of_fulfillment', 'Status')
+
+    def __init__(self, title, csv_file_path=None):
+        super(CompactCsvRequirementRepository, self).__init__(title, csv_file_path)
+        self.rows = ColumnTable(categorical=self.categorical)
+
+    def _load_snapshot(self, signature):
+        super(CompactCsvRequirementRepository, self)._load_snapshot(signature)
+        if not isinstance(self.rows, ColumnTable):
+            self.rows = ColumnTable(categorical=self.categorical)
+
+    def _read_snapshot(self, signature):
+        with open(self.csv_file_path, 'r') as f:
+            reader = csv.reader(f, delimiter=';')
+            field_names = next(reader, None) or list()
+            position = field_names.index('Specification_id') if field_names else None
+
+            rows = ColumnTable(field_names, self.categorical)
+            for values in reader:
+                if values:
+                    values.extend([None] * (len(field_names) - len(values)))
+                    rows[values[position]] = dict(zip(field_names, values))
+
+        return rows, field_names or None
+
+    def iter_rows(self):
+        """
+        Returns an iterator over the rows in the order of the file,
+        the dict of each row is built when the iterator reaches it
+        instead of building the dicts of all the rows at once.
+        """
+        with self._lock:
+            rows = self.load()
+            ids = list(rows)
+
+        return self._iter_rows(rows, ids)
+
+    def _iter_rows(self, rows, ids):
+        for requirement_id in ids:
+            with self._lock:
+                row = rows.get(requirement_id)
+            if row is not None:
+                yield row
+
+    def _compacted(self, signature):
+        # Loading the new file drops the space of the removed rows
+        self._load_snapshot(signature)
+
+
+class MappedCsvRequirementRepository(CsvRequirementRepository):
+    """
+    Repository for keeping the csv file as the only copy of the
+    requirements, the rows are read through a memory map of the
+    file using an index with the position of each row, the index
+    is stored next to the file and built again when the file changes.
+
+    Only the changes written on the journal are kept in memory, with
+    the indexes of the fields and of the text stored on the index
+    of the positions, the rows are not read for building them.
+    """
+
+    cache_snapshot = False
+
+    def __init__(self, title, csv_file_path=None):
+        super(MappedCsvRequirementRepository, self).__init__(title, csv_file_path)
+        self.index_path = self.csv_file_path + '.idx'
+        self.deleted = set()
+        self._index = (OrderedDict(), None)
+
+    def _read_snapshot(self, signature):
+        index = self._read_index(signature)
+        if index is None:
+            index = self._build_index(signature)
+
+        mapping = None
+        with open(self.csv_file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.deleted = set()
+        self._index = (index['offsets'], mapping)
+        self._indexes, self._text_index, self._ids = index['indexes'], index['text_index'], index['ids']
+
+        return OrderedDict(), index['field_names']
+
+    def _read_index(self, signature):
+        """
+        Returns the index of the file, None when it can not be used,
+        a truncated or damaged index fails with all kinds of
+        errors and is built again from the file.
+        """
+        try:
+            with open(self.index_path, 'rb') as f:
+                index = pickle.load(f)
+
+            if index['signature'] != signature or index['mapping'] != self.mapping_version() or \
+                    not isinstance(index['offsets'], OrderedDict):
+                return None
+
+            return index
+        except Exception:
+            return None
+
+    def _build_index(self, signature):
+        """
+        Reads the file once for getting the position and length
+        of each row, a row can take several lines when a
+        quoted value contains line breaks.
+
+        The indexes of the fields, the text index and the sorted ids
+        are built on the same pass and stored with the positions,
+        so the rows are not read again for building them.
+        """
+        offsets = OrderedDict()
+        self._indexes = dict((name, dict()) for name in self.indexed)
+        self._text_index = TextIndex()
+        with open(self.csv_file_path, 'rb') as f:
+            header = f.readline()
+            field_names = self.parse_values(header)
+            position = field_names.index('Specification_id')
+
+            offset = len(header)
+            while True:
+                data = line = f.readline()
+                if not line:
+                    break
+
+                while data.count(b'"') % 2 and line:
+                    line = f.readline()
+                    data += line
+
+                values = self.parse_values(data)
+                if values:
+                    offsets[values[position]] = (offset, len(data))
+                    self._add_to_indexes(values[position], dict(zip(field_names, values)))
+                offset += len(data)
+
+        index = {
+            'signature': signature,
+            'mapping': self.mapping_version(),
+            'field_names': field_names,
+            'offsets': offsets,
+            'indexes': self._indexes,
+            'text_index': self._text_index,
+            'ids': sorted(offsets),
+        }
+
+        tempfile = None
+        try:
+            tempfile = NamedTemporaryFile(mode='wb', dir=os.path.dirname(self.index_path), delete=False)
+            with tempfile:
+                pickle.dump(index, tempfile, pickle.HIGHEST_PROTOCOL)
+            replace(tempfile.name, self.index_path)
+        except (OSError, IOError) as e:
+            # The index is kept in memory, it is built again on the next load
+            logger.warning('The index {} could not be written: {}'.format(self.index_path, e))
+            if tempfile is not None and os.path.exists(tempfile.name):
+                os.remove(tempfile.name)
+
+        return index
+
+    @staticmethod
+    def parse_values(data):
+        if not six.PY2:
+            data = data.decode('utf-8')
+        for values in csv.reader(data.splitlines(True), delimiter=';'):
+            return values
+        return list()
+
+    def parse_row(self, data):
+        values = self.parse_values(data)
+        row = dict(zip(self.field_names, values))
+        for name in self.field_names[len(values):]:
+            row[name] = None
+        return row
+
+    def _apply(self, record):
+        super(MappedCsvRequirementRepository, self)._apply(record)
+        if record['op'] == 'delete':
+            self.deleted.add(record['id'])
+        else:
+            self.deleted.discard(record['id'])
+
+    def get_row(self, requirement_id):
+        self.load()
+        return self._current_row(requirement_id)
+
+    def _current_row(self, requirement_id):
+        offsets, mapping = self._index
+
+        row = self.rows.get(requirement_id)
+        if row is not None or requirement_id in self.deleted:
+            return row
+
+        position = offsets.get(requirement_id)
+        if position is None:
+            return None
+
+        offset, length = position
+        return self.parse_row(mapping[offset:offset + length])
+
+    def iter_rows(self):
+        with self._lock:
+            changes = OrderedDict(self.load())
+            deleted = set(self.deleted)
+            offsets, mapping = self._index
+
+        return self._iter_rows(changes, deleted, offsets, mapping)
+
+    def _compaction_rows(self):
+        # The iterator reads a copy of the changes and the index of
+        # the file at this state, the rows are not kept in memory.
+        return self.iter_rows()
+
+    def _iter_rows(self, changes, deleted, offsets, mapping):
+        for requirement_id, (offset, length) in six.iteritems(offsets):
+            if requirement_id in deleted:
+                continue
+
+            row = changes.pop(requirement_id, None)
+            yield row if row is not None else self.parse_row(mapping[offset:offset + length])
+
+        for row in six.itervalues(changes):
+            yield row
+
+    def count(self, filter=None, predicate=None, terms=None):
+        if filter or predicate is not None or terms:
+            return super(MappedCsvRequirementRepository, self).count(filter, predicate, terms)
+
+        with self._lock:
+            rows = self.load()
+            offsets = self._index[0]
+            added = sum(1 for requirement_id in rows if requirement_id not in offsets)
+            removed = sum(1 for requirement_id in self.deleted if requirement_id in offsets)
+
+            return len(offsets) + added - removed
+
+    def _compacted(self, signature):
+        # The rows were moved on the file, the index is built
+        # again and the remaining journal is applied on it.
+        self._load_snapshot(signature)
@@ -0,0 +1,50 @@
+import json
+
+from rdflib import Graph, RDF, XSD, DCTERMS
+
+from app.api.adapter.mappings.specification import specification_map
+from app.api.adapter.namespaces.business import get_repository
+from pyoslc.vocabularies.core import OSLC
+from pyoslc.vocabularies.rm import OSLC_RM
+
+# Formats for the export given by the parameter or the accept header
+formats = {
+    'nt': ('nt', 'application/n-triples'),
+    'application/n-triples': ('nt', 'application/n-triples'),
+    'turtle': ('turtle', 'text/turtle'),
+    'text/turtle': ('turtle', 'text/turtle'),
+    'json-ld': ('json-ld', 'application/x-ndjson'),
+    'application/x-ndjson': ('json-ld', 'application/x-ndjson'),
+}
+
+namespaces = [('rdf', RDF), ('xsd', XSD), ('dcterms', DCTERMS), ('oslc', OSLC), ('oslc_rm', OSLC_RM)]
+
+
+def export_requirements(base_url, rdf_format):
+    """
+    Yields the requirements of the repository serialized one by one,
+    a graph is built for each requirement so the memory used
+    does not depend on the number of requirements.
+
+    The turtle prefixes are written once at the beginning, the
+    json-ld format writes one document per line.
+    """
+    if rdf_format == 'turtle':
+        yield ''.join('@prefix {}: <{}> .\n'.format(prefix, namespace) for prefix, namespace in namespaces) + '\n'
+
+    for requirement in get_repository().iter():
+        graph = Graph()
+        for prefix, namespace in namespaces:
+            graph.bind(prefix, namespace, override=True)
+
+        requirement.to_rdf(graph, base_url, specification_map)
+
+        data = graph.serialize(format=rdf_format)
+        data = data.decode('utf-8') if not isinstance(data, str) else data
+
+        if rdf_format == 'turtle':
+            data = ''.join(line for line in data.splitlines(True) if not line.startswith('@prefix')).lstrip('\n')
+        elif rdf_format == 'json-ld':
+            data = json.dumps(json.loads(data)) + '\n'
+
+        yield data
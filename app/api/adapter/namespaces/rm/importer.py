@@ -0,0 +1,128 @@
+import csv
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from app.api.adapter.mappings.specification import specification_map
+from app.api.adapter.namespaces.business import get_repository
+from pyoslc.resources.domains.rm import Requirement
+
+logger = logging.getLogger(__name__)
+
+_jobs = dict()
+_jobs_lock = threading.Lock()
+
+
+class ImportJob(object):
+    """
+    Background job for loading the specifications of a csv file
+    into the repository, the file is read row by row and the
+    specifications are written in batches.
+    """
+
+    batch_size = 500
+    max_errors = 100
+
+    # Time the status of a finished job is kept
+    expiration = timedelta(hours=1)
+
+    def __init__(self, directory):
+        self.identifier = uuid.uuid4().hex
+        self.path = os.path.join(directory, self.identifier + '.csv')
+        self.status = 'pending'
+        self.rows = 0
+        self.imported = 0
+        self.errors = list()
+        self.created = datetime.utcnow()
+        self.finished = None
+        self._thread = None
+
+    def start(self, app):
+        with _jobs_lock:
+            evict_jobs()
+            _jobs[self.identifier] = self
+
+        self._thread = threading.Thread(target=self.run, args=(app,), name='import-' + self.identifier)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self, app):
+        self.status = 'running'
+        try:
+            with app.app_context():
+                repository = get_repository()
+                with open(self.path, 'r') as f:
+                    reader = csv.DictReader(f, delimiter=';')
+                    batch = list()
+                    for row in reader:
+                        self.rows += 1
+                        specification = self.validate(row)
+                        if specification:
+                            batch.append(specification)
+
+                        if len(batch) >= self.batch_size:
+                            self.imported += repository.bulk_upsert(batch)
+                            batch = list()
+
+                    if batch:
+                        self.imported += repository.bulk_upsert(batch)
+
+            self.status = 'done'
+        except Exception as e:
+            logger.exception('Error importing the file {}'.format(self.path))
+            self.status = 'failed'
+            self.errors.append('An exception has occurred: {}'.format(e))
+        finally:
+            self.finished = datetime.utcnow()
+            os.remove(self.path)
+
+    def validate(self, row):
+        """
+        Maps the row into the specification using the mapping
+        of the attributes, returns None when the row
+        does not contain the Specification_id.
+        """
+        requirement = Requirement()
+        requirement.update(row, attributes=specification_map)
+        specification = requirement.to_mapped_object(specification_map)
+
+        if not specification.get('Specification_id'):
+            if len(self.errors) < self.max_errors:
+                self.errors.append('Row {}: the Specification_id is required'.format(self.rows))
+            return None
+
+        return specification
+
+    def to_dict(self):
+        return {
+            'id': self.identifier,
+            'status': self.status,
+            'rows': self.rows,
+            'imported': self.imported,
+            'errors': self.errors,
+            'created': self.created.isoformat(),
+            'finished': self.finished.isoformat() if self.finished else None,
+        }
+
+
+def evict_jobs(now=None):
+    """
+    Removes the jobs finished before the expiration,
+    the running jobs are always kept.
+    """
+    now = now or datetime.utcnow()
+    for identifier, job in list(_jobs.items()):
+        if job.finished is not None and now - job.finished > job.expiration:
+            del _jobs[identifier]
+
+
+def get_job(identifier):
+    with _jobs_lock:
+        evict_jobs()
+        return _jobs.get(identifier)
@@ -1,10 +1,7 @@
-import csv
 import logging
 import os
-import shutil
-from tempfile import NamedTemporaryFile
 
-from flask import request, render_template, make_response, current_app
+from flask import request, render_template, make_response, current_app, jsonify, Response, stream_with_context
 from flask_restx import Resource
 from rdflib import Graph, RDF, DCTERMS
 from rdflib.plugin import PluginException
@@ -12,7 +9,9 @@ from rdflib.plugin import PluginException
 from app.api.adapter import api
 from app.api.adapter.exceptions import NotModified
 from app.api.adapter.mappings.specification import specification_map
-from app.api.adapter.namespaces.business import get_requirement, get_requirement_list
+from app.api.adapter.namespaces.business import get_requirement, get_requirement_list, get_repository
+from app.api.adapter.namespaces.rm.exporter import export_requirements, formats
+from app.api.adapter.namespaces.rm.importer import ImportJob, get_job
 from app.api.adapter.namespaces.rm.models import specification
 from app.api.adapter.namespaces.rm.parsers import specification_parser, csv_file_upload
 from pyoslc.resources.domains.rm import Requirement
@@ -136,29 +135,7 @@ class RequirementList(Resource):
         data = req.to_mapped_object(attributes)
 
         if data:
-            path = 'examples/specifications.csv'
-
-            tempfile = NamedTemporaryFile(mode='w', delete=False)
-
-            with open(path, 'r') as f:
-                reader = csv.DictReader(f, delimiter=';')
-                field_names = reader.fieldnames
-
-            with open(path, 'r') as csvfile, tempfile:
-                reader = csv.DictReader(csvfile, fieldnames=field_names, delimiter=';')
-                writer = csv.DictWriter(tempfile, fieldnames=field_names, delimiter=';')
-                exist = False
-                for row in reader:
-                    if row['Specification_id'] == data['Specification_id']:
-                        exist = True
-                    writer.writerow(row)
-
-                if not exist:
-                    writer.writerow(data)
-
-            shutil.move(tempfile.name, path)
-
-            if exist:
+            if not get_repository().create(data):
                 response_object = {
                     'status': 'fail',
                     'message': 'Not Modified'
@@ -253,31 +230,9 @@ class RequirementItem(Resource):
         data = specification_parser.parse_args()
 
         if data:
-            path = 'examples/specifications.csv'
-
-            tempfile = NamedTemporaryFile(mode='w', delete=False)
-
-            with open(path, 'r') as f:
-                reader = csv.DictReader(f, delimiter=';')
-                field_names = reader.fieldnames
-
-            with open(path, 'r') as csvfile, tempfile:
-                reader = csv.DictReader(csvfile, fieldnames=field_names, delimiter=';')
-                writer = csv.DictWriter(tempfile, fieldnames=field_names, delimiter=';')
-                modified = False
-
-                for row in reader:
-                    if row['Specification_id'] == str(id):
-                        rq = Requirement()
-                        rq.from_json(data, attributes)
-                        row = rq.to_mapped_object(attributes)
-                        row['Specification_id'] = id
-                        modified = True
-                    writer.writerow(row)
-
-            shutil.move(tempfile.name, path)
-
-            if not modified:
+            rq = Requirement()
+            rq.from_json(data, attributes)
+            if not get_repository().update(str(id), rq.to_mapped_object(attributes)):
                 return make_response('{Not Modified}', 304)
 
         return make_response('{}', 200)
@@ -288,30 +243,35 @@ class RequirementItem(Resource):
         This method will remove a requirement from the store
         """
 
-        path = 'examples/specifications.csv'
+        if not get_repository().delete(str(id)):
+            raise NotModified  # make_response('{Not Modified}', 304)
 
-        tempfile = NamedTemporaryFile(mode='w', delete=False)
+        return make_response('{}', 200)
 
-        with open(path, 'r') as f:
-            reader = csv.DictReader(f, delimiter=';')
-            field_names = reader.fieldnames
 
-        modified = False
-        with open(path, 'r') as csvfile, tempfile:
-            reader = csv.DictReader(csvfile, fieldnames=field_names, delimiter=';')
-            writer = csv.DictWriter(tempfile, fieldnames=field_names, delimiter=';')
-            for row in reader:
-                if row['Specification_id'] != str(id):
-                    writer.writerow(row)
-                else:
-                    modified = True
+class RequirementExport(Resource):
+    """
+    Class for implementing the method for exporting
+    all the requirements of the store
+    """
 
-        shutil.move(tempfile.name, path)
+    def get(self):
+        """
+        Export all the Requirements as a stream of RDF statements
+        Use the format parameter (nt, turtle or json-ld) or the
+        accept header for selecting the format, json-ld
+        writes one document per line
+        """
+        rdf_format, content_type = formats.get(request.args.get('format') or request.headers.get('accept'),
+                                               formats['nt'])
 
-        if not modified:
-            raise NotModified  # make_response('{Not Modified}', 304)
+        base_url = request.base_url.rsplit('/', 1)[0] + '/requirement'
 
-        return make_response('{}', 200)
+        response = Response(stream_with_context(export_requirements(base_url, rdf_format)),
+                            content_type=content_type)
+        response.headers['OSLC-Core-Version'] = "2.0"
+
+        return response
 
 
 class UploadCollection(Resource):
@@ -331,11 +291,34 @@ class UploadCollection(Resource):
             destination = os.path.join(current_app.instance_path, 'medias/')
             if not os.path.exists(destination):
                 os.makedirs(destination)
-            csv_file = '%s%s' % (destination, 'custom_file_name.csv')
-            args['csv_file'].save(csv_file)
 
-            # TODO take each line of CSV to process for RDF format
+            # The file is copied in chunks and loaded
+            # into the repository by a background job
+            job = ImportJob(destination)
+            args['csv_file'].save(job.path, buffer_size=64 * 1024)
+            job.start(current_app._get_current_object())
         else:
             return make_response('{Bad request}', 404)
 
-        return make_response('{\'status\': \'Done\'}', 200)
+        response = make_response(jsonify(job.to_dict()), 202)
+        response.headers['Location'] = request.base_url + '/' + job.identifier
+
+        return response
+
+
+class UploadStatus(Resource):
+    """
+    Class for implementing the method for checking
+    the progress of an upload
+    """
+
+    def get(self, job_id):
+        """
+        Retrieve the status of the loading of a CSV file
+        Use this method for checking the progress of an upload
+        """
+        job = get_job(job_id)
+        if not job:
+            return {'status': 'fail', 'message': 'Not Found'}, 404
+
+        return job.to_dict(), 200
@@ -0,0 +1,298 @@
+import csv
+import heapq
+import itertools
+import os
+import shutil
+import threading
+from tempfile import mkdtemp
+
+import six
+from six.moves.urllib.parse import quote, unquote
+
+from app.api.adapter.namespaces.rm.csv_requirement_repository import CsvRequirementRepository
+from app.api.adapter.resources.query import Order, specification_of
+from app.api.adapter.resources.repository import Repository
+
+
+class ShardedCsvRequirementRepository(Repository):
+    """
+    Repository keeping the requirements of each Project on its own
+    csv file (a shard), with its own journal, lock and indexes,
+    so the requests of a service provider only read and lock
+    the shard of the project.
+
+    The shards are stored on a directory next to the csv file,
+    the directory is created splitting the csv file the first
+    time, after that the csv file is not used anymore.
+    """
+
+    shard_class = CsvRequirementRepository
+    prefix = 'project-'
+
+    def __init__(self, title, csv_file_path=None):
+        super(ShardedCsvRequirementRepository, self).__init__(title)
+        self.csv_file_path = csv_file_path or os.path.join(
+            os.path.abspath(''), 'examples', 'specifications.csv')
+        self.directory = os.path.splitext(self.csv_file_path)[0]
+
+        self.field_names = None
+        self._shards = dict()
+        self._directory_signature = None
+        self._watcher = None
+        self._lock = threading.RLock()
+
+    @property
+    def version(self):
+        return sum(shard.version for shard in self.shards().values())
+
+    def current_version(self):
+        return sum(shard.current_version() for shard in self.shards().values())
+
+    def shard_path(self, project):
+        return os.path.join(self.directory, self.prefix + quote(project or '', safe='') + '.csv')
+
+    def split(self):
+        """
+        Writes the rows of the csv file, including the changes of
+        its journal, on one file per project, the directory is
+        renamed when all the files were written.
+        """
+        source = self.shard_class(self.title, self.csv_file_path)
+        source.load()
+
+        directory = mkdtemp(dir=os.path.dirname(self.directory))
+        files = dict()
+        try:
+            for row in source.iter_rows():
+                project = row.get('Project') or ''
+                if project not in files:
+                    f = open(os.path.join(directory, os.path.basename(self.shard_path(project))), 'w')
+                    writer = csv.DictWriter(f, fieldnames=source.field_names, delimiter=';')
+                    writer.writeheader()
+                    files[project] = (f, writer)
+
+                files[project][1].writerow(row)
+        finally:
+            for f, _ in files.values():
+                f.close()
+
+        try:
+            os.rename(directory, self.directory)
+        except OSError:
+            # Another process has split the file
+            shutil.rmtree(directory)
+
+    def shards(self):
+        """
+        Returns the shards keyed by project, the directory is
+        listed again only when its content changes.
+        """
+        try:
+            signature = os.stat(self.directory).st_mtime
+        except OSError:
+            signature = None
+
+        if signature is not None and signature == self._directory_signature:
+            return self._shards
+
+        with self._lock:
+            if signature is None:
+                if not os.path.exists(self.csv_file_path):
+                    return self._shards
+                self.split()
+                signature = os.stat(self.directory).st_mtime
+
+            for name in sorted(os.listdir(self.directory)):
+                if name.startswith(self.prefix) and name.endswith('.csv'):
+                    project = unquote(name[len(self.prefix):-len('.csv')])
+                    if project not in self._shards:
+                        self._add_shard(project)
+
+            self._directory_signature = signature
+
+        return self._shards
+
+    def _add_shard(self, project):
+        shard = self.shard_class(self.title + '-' + project, self.shard_path(project))
+        if self.field_names is None:
+            with open(shard.csv_file_path, 'r') as f:
+                self.field_names = next(csv.reader(f, delimiter=';'), None)
+        if self._watcher is not None:
+            shard.watch(self._watcher)
+
+        self._shards[project] = shard
+        return shard
+
+    def shard(self, project, create=False):
+        """
+        Returns the shard of the project, the file of the shard
+        is created with the header when it does not exist.
+        """
+        shard = self.shards().get(project or '')
+        if shard is not None or not create:
+            return shard
+
+        with self._lock:
+            shard = self._shards.get(project or '')
+            if shard is None:
+                if not os.path.isdir(self.directory):
+                    os.makedirs(self.directory)
+
+                if self.field_names and not os.path.exists(self.shard_path(project)):
+                    with open(self.shard_path(project), 'w') as f:
+                        csv.DictWriter(f, fieldnames=self.field_names, delimiter=';').writeheader()
+
+                shard = self._add_shard(project or '')
+
+        return shard
+
+    def locate(self, requirement_id):
+        """
+        Returns the shard with the requirement or None.
+        """
+        for project in sorted(self.shards()):
+            shard = self._shards[project]
+            if shard.get_row(requirement_id) is not None:
+                return shard
+
+        return None
+
+    def _select(self, filter):
+        # The shards for the filter and the rest of the filter
+        shards = self.shards()
+        if filter and 'Project' in filter:
+            shard = shards.get(filter['Project'] or '')
+            filter = dict((key, value) for key, value in six.iteritems(filter) if key != 'Project')
+            return [shard] if shard is not None else [], filter or None
+
+        return [shards[project] for project in sorted(shards)], filter
+
+    def watch(self, watcher):
+        self._watcher = watcher
+        for shard in self.shards().values():
+            shard.watch(watcher)
+
+    def find(self, requirement_id):
+        shard = self.locate(requirement_id)
+        return shard.find(requirement_id) if shard is not None else None
+
+    def iter(self, filter=None, fields=None, predicate=None):
+        """
+        Yields the requirements of each shard, only the shard of
+        the project is read when the filter has the Project.
+        """
+        shards, filter = self._select(filter)
+        for shard in shards:
+            for requirement in shard.iter(filter, fields, predicate):
+                yield requirement
+
+    def page(self, filter=None, after=None, limit=100, fields=None, predicate=None, order=None):
+        """
+        Returns the first requirements of the pages of the
+        shards selected by the filter.
+        """
+        if order is None:
+            def key(requirement):
+                return six.text_type(requirement.identifier)
+        else:
+            def key(requirement):
+                return order.key(specification_of(requirement))
+
+        shards, filter = self._select(filter)
+        pages = [((key(requirement), requirement) for requirement in
+                  shard.page(filter, after, limit, fields, predicate, order)) for shard in shards]
+
+        return [requirement for _, requirement in itertools.islice(heapq.merge(*pages), limit)]
+
+    def rank(self, terms, filter=None, after=None, limit=100, fields=None, predicate=None, order=None):
+        """
+        Returns the first requirements of the rankings of the shards
+        selected by the filter, scored with the statistics of the
+        text indexes of all the shards.
+        """
+        order = order or Order()
+        count, total_length, documents = 0, 0, dict()
+        for shard in self.shards().values():
+            shard_count, shard_length, shard_documents = shard.text_statistics(terms)
+            count += shard_count
+            total_length += shard_length
+            for word, number in six.iteritems(shard_documents):
+                documents[word] = documents.get(word, 0) + number
+
+        shards, filter = self._select(filter)
+        rankings = [((order.key(specification_of(requirement), score), requirement, score)
+                     for requirement, score in shard.rank(terms, filter, after, limit, fields, predicate, order,
+                                                          (count, total_length, documents)))
+                    for shard in shards]
+
+        return [(requirement, score) for _, requirement, score in itertools.islice(heapq.merge(*rankings), limit)]
+
+    def search(self, terms, fields=None, after=None):
+        """
+        Yields the requirements found on the shards, ordered
+        by identifier starting after the identifier given.
+        """
+        results = [((requirement.identifier, requirement) for requirement in shard.search(terms, fields, after))
+                   for shard in self.shards().values()]
+
+        for _, requirement in heapq.merge(*results):
+            yield requirement
+
+    def count(self, filter=None, predicate=None, terms=None):
+        shards, filter = self._select(filter)
+        return sum(shard.count(filter, predicate, terms) for shard in shards)
+
+    def create(self, specification):
+        with self._lock:
+            if self.locate(specification['Specification_id']) is not None:
+                return False
+
+            return self.shard(specification.get('Project'), create=True).create(specification)
+
+    def update(self, requirement_id, specification):
+        """
+        Replaces the specification, the requirement is moved
+        to the shard of the new project when it changes.
+        """
+        with self._lock:
+            current = self.locate(requirement_id)
+            if current is None:
+                return False
+
+            shard = self.shard(specification.get('Project'), create=True)
+            if shard is current:
+                return current.update(requirement_id, specification)
+
+            specification = dict(specification, Specification_id=requirement_id)
+            return shard.create(specification) and current.delete(requirement_id)
+
+    def delete(self, requirement_id):
+        with self._lock:
+            shard = self.locate(requirement_id)
+            return shard.delete(requirement_id) if shard is not None else False
+
+    def bulk_upsert(self, specifications):
+        """
+        Writes the specifications on the shard of each project as one
+        group, removing them from the shards of other projects.
+        """
+        groups = dict()
+        for specification in specifications:
+            groups.setdefault(specification.get('Project') or '', list()).append(specification)
+
+        written = 0
+        with self._lock:
+            for project, group in six.iteritems(groups):
+                shard = self.shard(project, create=True)
+                for other in list(self.shards().values()):
+                    if other is not shard:
+                        other.bulk_delete(specification['Specification_id'] for specification in group)
+
+                written += shard.bulk_upsert(group)
+
+        return written
+
+    def bulk_delete(self, requirement_ids):
+        requirement_ids = set(requirement_ids)
+        with self._lock:
+            return sum(shard.bulk_delete(requirement_ids) for shard in list(self.shards().values()))
@@ -0,0 +1,416 @@
+from collections import OrderedDict
+from datetime import datetime
+
+import six
+from sqlalchemy.exc import IntegrityError
+
+from app.api.adapter.mappings.specification import specification_map
+from app.api.adapter.resources.query import Descending, Query, operators, value_type
+from app.api.adapter.resources.repository import Repository
+from app.api.adapter.resources.text import matches, tokenize
+from pyoslc.resources.domains.rm import Requirement
+from pyoslc_oauth.database import db
+
+
+class RequirementRecord(db.Model):
+    __tablename__ = 'requirement'
+
+    id = db.Column(db.Integer, primary_key=True)
+    identifier = db.Column(db.String(255), unique=True, index=True, nullable=False)
+    product = db.Column(db.String(255))
+    project = db.Column(db.String(255), index=True)
+    title = db.Column(db.Text)
+    description = db.Column(db.Text)
+    source = db.Column(db.String(255))
+    author = db.Column(db.String(255))
+    category = db.Column(db.String(255))
+    discipline = db.Column(db.String(255))
+    revision = db.Column(db.String(255))
+    target_value = db.Column(db.String(255))
+    degree_of_fulfillment = db.Column(db.String(255))
+    status = db.Column(db.String(255), index=True)
+    modified = db.Column(db.DateTime, index=True, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class RequirementVersion(db.Model):
+    __tablename__ = 'requirement_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    counter = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SqlRequirementRepository(Repository):
+    """
+    Repository for storing the requirements on a table of the
+    database configured for the application, it requires
+    an application context for accessing the database.
+    """
+
+    # Columns of the specification (csv file) stored on each field of the table
+    fields = OrderedDict([
+        ('Specification_id', 'identifier'),
+        ('Product', 'product'),
+        ('Project', 'project'),
+        ('Title', 'title'),
+        ('Description', 'description'),
+        ('Source', 'source'),
+        ('Author', 'author'),
+        ('Category', 'category'),
+        ('Discipline', 'discipline'),
+        ('Revision', 'revision'),
+        ('Target_Value', 'target_value'),
+        ('Degree_of_fulfillment', 'degree_of_fulfillment'),
+        ('Status', 'status'),
+    ])
+
+    # Number of identifiers sent on each query of the bulk operations
+    group_size = 500
+
+    # Values of a column ordered as numbers, the values Decimal reads
+    number_pattern = r'^\s*[+-]?([0-9]+(\.[0-9]*)?|\.[0-9]+)([eE][+-]?[0-9]+)?\s*$'
+
+    def __init__(self, title):
+        super(SqlRequirementRepository, self).__init__(title)
+        self._created = False
+
+    @property
+    def query(self):
+        self.create_tables()
+        return RequirementRecord.query
+
+    def create_tables(self):
+        """
+        Creates the tables of the requirements and of the
+        counter of the changes when they do not exist.
+        """
+        if self._created:
+            return
+
+        RequirementRecord.__table__.create(bind=db.engine, checkfirst=True)
+        RequirementVersion.__table__.create(bind=db.engine, checkfirst=True)
+        if RequirementVersion.query.filter_by(id=1).first() is None:
+            try:
+                db.session.add(RequirementVersion(id=1, counter=0))
+                db.session.commit()
+            except IntegrityError:
+                # Added by another process
+                db.session.rollback()
+        self._created = True
+
+    def changed(self):
+        """
+        Increments the counter of the changes on the transaction
+        of the write, so the version changes on every write.
+        """
+        self.create_tables()
+        RequirementVersion.query.filter_by(id=1).update({RequirementVersion.counter: RequirementVersion.counter + 1},
+                                                        synchronize_session=False)
+
+    @classmethod
+    def to_specification(cls, record, fields=None):
+        specification = dict()
+        for key in fields or cls.fields:
+            value = getattr(record, cls.fields[key])
+            specification[key] = value if value is not None else ''
+
+        return specification
+
+    @classmethod
+    def to_requirement(cls, record, fields=None):
+        requirement = Requirement()
+        requirement.update(cls.to_specification(record, fields), attributes=specification_map)
+        return requirement
+
+    @classmethod
+    def assign(cls, record, specification):
+        for key, field in six.iteritems(cls.fields):
+            value = specification.get(key, '')
+            setattr(record, field, value if isinstance(value, six.string_types) else str(value))
+
+    def filter(self, filter=None):
+        query = self.query
+        for key, value in six.iteritems(filter or dict()):
+            query = query.filter(getattr(RequirementRecord, self.fields[key]) == value)
+
+        return query
+
+    def current_version(self):
+        """
+        Returns the counter of the changes, incremented by
+        each write of the requirements of any process.
+        """
+        self.create_tables()
+        return db.session.query(RequirementVersion.counter).filter_by(id=1).scalar()
+
+    def find(self, requirement_id):
+        record = self.query.filter_by(identifier=requirement_id).first()
+        return self.to_requirement(record) if record else None
+
+    def find_many(self, requirement_ids):
+        requirement_ids = list(requirement_ids)
+        records = dict()
+        for start in range(0, len(requirement_ids), self.group_size):
+            group = requirement_ids[start:start + self.group_size]
+            for record in self.query.filter(RequirementRecord.identifier.in_(group)):
+                records[record.identifier] = record
+
+        return [self.to_requirement(records[requirement_id])
+                for requirement_id in requirement_ids if requirement_id in records]
+
+    def clause(self, column, op, value):
+        """
+        Returns the SQL condition of a term of the where, None when
+        the database does not compare the values as the predicate,
+        the numbers are not compared since the columns are text.
+        """
+        field = getattr(RequirementRecord, self.fields[column])
+        if op == 'in':
+            if any(value_type(v) != 'string' for v in value):
+                return None
+            return field.in_([six.text_type(v) for v in value])
+
+        kind = value_type(value)
+        if kind == 'number':
+            return None
+
+        if kind == 'boolean':
+            return operators[op](db.func.lower(field), 'true' if value.value else 'false')
+
+        return operators[op](field, six.text_type(value))
+
+    def where(self, filter=None, predicate=None):
+        """
+        Returns the query of the filter and of the terms of the compiled
+        where evaluated by the database, with the predicate for the
+        other terms, None when the database evaluates all of them.
+        """
+        query = self.filter(filter)
+        if not isinstance(predicate, Query):
+            return query, predicate
+
+        remaining = Query()
+        for column, op, value in predicate.terms:
+            clause = self.clause(column, op, value)
+            if clause is None:
+                remaining.add(column, op, value)
+            else:
+                query = query.filter(clause)
+
+        return query, remaining.predicate
+
+    def iter_text(self):
+        query = self.query.with_entities(RequirementRecord.identifier, RequirementRecord.title,
+                                         RequirementRecord.description)
+        for identifier, title, description in query.yield_per(1000):
+            yield identifier, (identifier, title, description)
+
+    def select_ids(self, filter=None, predicate=None):
+        query, predicate = self.where(filter, predicate)
+        if predicate is None:
+            return set(identifier for identifier, in query.with_entities(RequirementRecord.identifier))
+
+        return set(record.identifier for record in query.yield_per(1000) if predicate(self.to_specification(record)))
+
+    def iter(self, filter=None, fields=None, predicate=None):
+        """
+        Yields the requirements ordered by identifier, only the
+        columns for the fields are selected from the table.
+        """
+        query, predicate = self.where(filter, predicate)
+        if fields:
+            fields = list(set(fields) | {'Specification_id'})
+        if fields and predicate is None:
+            query = query.with_entities(*[getattr(RequirementRecord, self.fields[key]) for key in fields])
+
+        for record in query.order_by(RequirementRecord.identifier).yield_per(1000):
+            if predicate is None or predicate(self.to_specification(record)):
+                yield self.to_requirement(record, fields)
+
+    def page(self, filter=None, after=None, limit=100, fields=None, predicate=None, order=None):
+        """
+        Returns the page reading the records from the cursor using
+        the index of the identifier, the query is limited to the
+        page when the database evaluates all the where.
+        """
+        query, predicate = self.where(filter, predicate)
+        if order is not None and order.columns != ['Specification_id']:
+            return self._page_by_order(query, after, limit, fields, predicate, order)
+
+        descending = order is not None and order.keys[0][1]
+        if order is not None and after is not None:
+            after = after[0].key if descending else after[0]
+
+        identifier = RequirementRecord.identifier
+        if after is not None:
+            query = query.filter(identifier < after if descending else identifier > after)
+        query = query.order_by(identifier.desc() if descending else identifier)
+
+        return self._read_page(query, limit, fields, predicate)
+
+    def _read_page(self, query, limit, fields, predicate):
+        # The query is limited to the page when the
+        # database evaluates all the where
+        if fields:
+            fields = list(set(fields) | {'Specification_id'})
+
+        if predicate is None:
+            if fields:
+                query = query.with_entities(*[getattr(RequirementRecord, self.fields[key]) for key in fields])
+            return [self.to_requirement(record, fields) for record in query.limit(limit)]
+
+        requirements = list()
+        for record in query.yield_per(1000):
+            if predicate(self.to_specification(record)):
+                requirements.append(self.to_requirement(record, fields))
+                if len(requirements) == limit:
+                    break
+
+        return requirements
+
+    def sort_keys(self, column):
+        """
+        Returns the SQL expressions of the key of the column on the
+        order, the same values sort_value gives: the numbers go
+        first ordered as numbers followed by the other values.
+        """
+        field = getattr(RequirementRecord, self.fields[column])
+        if column == 'Specification_id':
+            return [field]
+
+        number = field.regexp_match(self.number_pattern)
+        return [db.case((number, 0), else_=1),
+                db.case((number, db.cast(field, db.Float)), else_=0),
+                db.case((number, ''), else_=field)]
+
+    def _page_by_order(self, query, after, limit, fields, predicate, order):
+        # The database sorts the records using the keys of the order
+        # and the page starts after the key of the cursor
+        keys = list()
+        for position, (column, descending) in enumerate(order.keys):
+            component = after[position] if after is not None else None
+            if isinstance(component, Descending):
+                component = component.key
+            if column != 'Specification_id' and component is not None:
+                component = (component[0], float(component[1]), component[2])
+            elif component is not None:
+                component = (component,)
+
+            for index, expression in enumerate(self.sort_keys(column)):
+                keys.append((expression, descending, component[index] if component is not None else None))
+
+        if after is not None:
+            conditions = list()
+            for position, (expression, descending, value) in enumerate(keys):
+                following = expression < value if descending else expression > value
+                conditions.append(db.and_(*([previous == v for previous, _, v in keys[:position]] + [following])))
+            query = query.filter(db.or_(*conditions))
+
+        query = query.order_by(*[expression.desc() if descending else expression for expression, descending, _ in keys])
+
+        return self._read_page(query, limit, fields, predicate)
+
+    def search(self, terms, fields=None, after=None):
+        """
+        Selects the records containing the words of the terms
+        and checks that the words begin a word of the record.
+        """
+        query = self.query
+        if after is not None:
+            query = query.filter(RequirementRecord.identifier > after)
+        for term in set(tokenize(terms)):
+            pattern = '%{}%'.format(term)
+            query = query.filter(db.or_(RequirementRecord.identifier.ilike(pattern),
+                                        RequirementRecord.title.ilike(pattern),
+                                        RequirementRecord.description.ilike(pattern)))
+
+        for record in query.order_by(RequirementRecord.identifier).yield_per(1000):
+            if matches(terms, (record.identifier, record.title, record.description)):
+                yield self.to_requirement(record, fields)
+
+    def count(self, filter=None, predicate=None, terms=None):
+        """
+        Counts the records on the database, the records are read only
+        for checking the terms of the where not evaluated by the
+        database or the terms of the search.
+        """
+        if terms:
+            return super(SqlRequirementRepository, self).count(filter, predicate, terms)
+
+        query, predicate = self.where(filter, predicate)
+        if predicate is None:
+            return query.count()
+
+        return sum(1 for record in query.yield_per(1000) if predicate(self.to_specification(record)))
+
+    def create(self, specification):
+        identifier = specification['Specification_id']
+        if self.query.filter_by(identifier=identifier).count():
+            return False
+
+        record = RequirementRecord()
+        self.assign(record, specification)
+        db.session.add(record)
+        self.changed()
+        db.session.commit()
+
+        return True
+
+    def bulk_upsert(self, specifications):
+        """
+        Adds or replaces the specifications in one transaction,
+        the existing records are selected in groups for
+        keeping the number of parameters of the query low.
+        """
+        specifications = list(specifications)
+        for start in range(0, len(specifications), self.group_size):
+            group = specifications[start:start + self.group_size]
+            identifiers = [specification['Specification_id'] for specification in group]
+            records = dict((record.identifier, record) for record in
+                           self.query.filter(RequirementRecord.identifier.in_(identifiers)))
+
+            for specification in group:
+                record = records.get(specification['Specification_id'])
+                if record is None:
+                    record = RequirementRecord()
+                    db.session.add(record)
+                    records[specification['Specification_id']] = record
+                self.assign(record, specification)
+
+        if specifications:
+            self.changed()
+        db.session.commit()
+
+        return len(specifications)
+
+    def update(self, requirement_id, specification):
+        record = self.query.filter_by(identifier=requirement_id).first()
+        if record is None:
+            return False
+
+        self.assign(record, specification)
+        record.identifier = requirement_id
+        self.changed()
+        db.session.commit()
+
+        return True
+
+    def delete(self, requirement_id):
+        deleted = self.query.filter_by(identifier=requirement_id).delete(synchronize_session=False)
+        if deleted:
+            self.changed()
+        db.session.commit()
+
+        return deleted > 0
+
+    def bulk_delete(self, requirement_ids):
+        requirement_ids = list(requirement_ids)
+        deleted = 0
+        for start in range(0, len(requirement_ids), self.group_size):
+            group = requirement_ids[start:start + self.group_size]
+            deleted += self.query.filter(RequirementRecord.identifier.in_(group)).delete(synchronize_session=False)
+
+        if deleted:
+            self.changed()
+        db.session.commit()
+
+        return deleted
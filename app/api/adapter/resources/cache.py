@@ -0,0 +1,55 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Cache keeping the values used most recently,
+    shared between the threads of the application.
+
+    When maxbytes is given the values are also limited by their
+    total size, given by the function size, and a value larger
+    than maxbytes is not kept.
+    """
+
+    def __init__(self, maxsize=256, maxbytes=None, size=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.size = size or len
+        self.items = OrderedDict()
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self.items:
+                return default
+
+            value, size = self.items[key] = self.items.pop(key)
+            return value
+
+    def put(self, key, value):
+        size = self.size(value) if self.maxbytes is not None else 0
+        with self._lock:
+            self._remove(key)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+
+            self.items[key] = (value, size)
+            self.total += size
+            while len(self.items) > self.maxsize or self.maxbytes is not None and self.total > self.maxbytes:
+                _, (_, removed) = self.items.popitem(last=False)
+                self.total -= removed
+
+    def _remove(self, key):
+        if key in self.items:
+            _, size = self.items.pop(key)
+            self.total -= size
+
+    def clear(self):
+        with self._lock:
+            self.items.clear()
+            self.total = 0
+
+    def __len__(self):
+        return len(self.items)
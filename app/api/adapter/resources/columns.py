@@ -0,0 +1,126 @@
+from array import array
+
+from six.moves import collections_abc
+
+
+class Column(object):
+    """
+    Values of one field for all the rows, stored as a list.
+    """
+
+    def __init__(self):
+        self.values = list()
+
+    def append(self, value):
+        self.values.append(value)
+
+    def __getitem__(self, position):
+        return self.values[position]
+
+    def __setitem__(self, position, value):
+        self.values[position] = value
+
+
+class CategoricalColumn(Column):
+    """
+    Values of one field with a few distinct values, each distinct
+    value is stored once and the rows keep the code of the value
+    on an array of integers.
+    """
+
+    def __init__(self):
+        super(CategoricalColumn, self).__init__()
+        self.codes = dict()
+        self.values = array('i')
+        self.dictionary = list()
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.dictionary)
+            self.dictionary.append(value)
+        return code
+
+    def append(self, value):
+        self.values.append(self.encode(value))
+
+    def __getitem__(self, position):
+        return self.dictionary[self.values[position]]
+
+    def __setitem__(self, position, value):
+        self.values[position] = self.encode(value)
+
+
+class ColumnTable(collections_abc.MutableMapping):
+    """
+    Mapping of the rows keyed by the Specification_id, the values
+    of each field are stored together on a column instead of
+    keeping one dict per row, the dict of a row is built when
+    the row is read.
+
+    The rows keep the order in which they were added.
+    """
+
+    def __init__(self, field_names=None, categorical=()):
+        self.categorical = set(categorical)
+        self.columns = list()
+        self.field_names = list()
+        self.ids = list()
+        self.positions = dict()
+        for name in field_names or ():
+            self.add_column(name)
+
+    def add_column(self, name):
+        column = CategoricalColumn() if name in self.categorical else Column()
+        for _ in self.ids:
+            column.append(None)
+
+        self.field_names.append(name)
+        self.columns.append(column)
+
+    def __getitem__(self, requirement_id):
+        position = self.positions[requirement_id]
+        return dict((name, column[position]) for name, column in zip(self.field_names, self.columns))
+
+    def __setitem__(self, requirement_id, row):
+        for name in row:
+            if name not in self.field_names:
+                self.add_column(name)
+
+        position = self.positions.get(requirement_id)
+        if position is None:
+            self.positions[requirement_id] = len(self.ids)
+            self.ids.append(requirement_id)
+            for name, column in zip(self.field_names, self.columns):
+                column.append(row.get(name))
+        else:
+            for name, column in zip(self.field_names, self.columns):
+                column[position] = row.get(name)
+
+    def __delitem__(self, requirement_id):
+        position = self.positions.pop(requirement_id)
+        self.ids[position] = None
+        for column in self.columns:
+            column[position] = None
+
+    def __iter__(self):
+        for requirement_id in self.ids:
+            if requirement_id is not None:
+                yield requirement_id
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, requirement_id):
+        return requirement_id in self.positions
+
+    def values(self):
+        for requirement_id in self:
+            yield self[requirement_id]
+
+    def cardinality(self):
+        """
+        Returns the number of distinct values of each categorical column.
+        """
+        return dict((name, len(column.dictionary)) for name, column in zip(self.field_names, self.columns)
+                    if isinstance(column, CategoricalColumn))
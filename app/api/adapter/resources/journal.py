@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from tempfile import NamedTemporaryFile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class Journal(object):
+    """
+    Append-only log of the changes applied to a store,
+    each record is written as a json line and the file
+    is synced once for each group of records.
+
+    The changes of the file are done holding a lock on a file
+    next to the journal, so the appends of other processes are
+    not lost when the journal is replaced by a compaction.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._depth = 0
+
+    @contextmanager
+    def locked(self):
+        """
+        Holds the lock of the journal for this thread and
+        the other processes, the lock is reentrant.
+        """
+        with self._lock:
+            if self._depth == 0 and fcntl is not None:
+                self._lock_file = open(self.path + '.lock', 'a')
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def append(self, records):
+        """
+        Writes the records at the end of the journal and
+        returns the offsets where the records start and end.
+        """
+        data = ''.join(json.dumps(record, sort_keys=True) + '\n' for record in records).encode('utf-8')
+        with self.locked():
+            with open(self.path, 'ab') as f:
+                f.seek(0, os.SEEK_END)
+                start = f.tell()
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                return start, start + len(data)
+
+    def replay(self, offset=0):
+        """
+        Yields the records written after the offset together
+        with the offset where each record ends, a partially
+        written record at the end of the file is ignored.
+        """
+        try:
+            f = open(self.path, 'rb')
+        except IOError:
+            return
+
+        with f:
+            f.seek(offset)
+            while True:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                try:
+                    record = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    # Damaged by an interrupted append
+                    continue
+                yield offset, record
+
+    def recover(self):
+        """
+        Truncates a record left partially written by an
+        interrupted append, so the next records are not lost.
+        """
+        with self.locked():
+            try:
+                with open(self.path, 'r+b') as f:
+                    data = f.read()
+                    end = data.rfind(b'\n') + 1
+                    if end != len(data):
+                        f.truncate(end)
+            except IOError:
+                pass
+
+    def discard(self, offset):
+        """
+        Removes the records written before the offset, the
+        remaining records are kept on a new file that
+        replaces the journal.
+        """
+        with self.locked():
+            try:
+                with open(self.path, 'rb') as f:
+                    f.seek(offset)
+                    remaining = f.read()
+            except IOError:
+                return
+
+            if not remaining:
+                os.remove(self.path)
+                return
+
+            tempfile = NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(self.path)), delete=False)
+            with tempfile:
+                tempfile.write(remaining)
+                tempfile.flush()
+                os.fsync(tempfile.fileno())
+            replace(tempfile.name, self.path)
+
+
+def replace(source, destination):
+    """
+    Moves the source file over the destination in a single
+    step, the readers see either the old or the new file.
+    """
+    getattr(os, 'replace', os.rename)(source, destination)
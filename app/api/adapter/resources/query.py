@@ -0,0 +1,316 @@
+import json
+import operator
+from decimal import Decimal, InvalidOperation
+from functools import total_ordering
+
+import six
+from rdflib import RDF, XSD, Literal, URIRef
+
+from app.api.adapter.mappings.specification import specification_map
+from app.api.adapter.resources.cache import LRUCache
+from pyoslc.query import QueryError, parse_order_by, parse_prefixes, parse_select, parse_where
+from pyoslc.resources.mapping import property_uri
+from pyoslc.vocabularies.rm import OSLC_RM
+
+operators = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+}
+
+
+def property_columns(mapping):
+    """
+    Returns the column of the specification for
+    the URI of each property of the mapping.
+    """
+    return dict((property_uri(item['oslc_property']), column) for column, item in six.iteritems(mapping))
+
+
+def to_decimal(value):
+    try:
+        return Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+def value_type(value):
+    """
+    Returns how the value of a term is compared with the
+    values of a column, as a boolean, number or string.
+    """
+    if isinstance(value, Literal) and isinstance(value.value, bool):
+        return 'boolean'
+
+    if isinstance(value, Literal) and isinstance(value.value, (six.integer_types, float, Decimal)):
+        return 'number'
+
+    return 'string'
+
+
+def comparison(op, value):
+    """
+    Returns the function comparing the value of a column with
+    the value of the term, the numbers are compared as numbers
+    and any other value as a string.
+    """
+    compare = operators[op]
+    kind = value_type(value)
+
+    if kind == 'boolean':
+        expected = 'true' if value.value else 'false'
+        return lambda v: compare((v or '').lower(), expected)
+
+    if kind == 'number':
+        expected = Decimal(str(value.value))
+
+        def compare_number(v):
+            number = to_decimal(v)
+            return number is not None and compare(number, expected)
+
+        return compare_number
+
+    expected = six.text_type(value)
+    return lambda v: compare(v or '', expected)
+
+
+def sort_value(value):
+    """
+    Returns the key for ordering the values of a column,
+    the numbers go first ordered as numbers followed by
+    the other values ordered as strings.
+    """
+    number = to_decimal(value)
+    if number is not None and number.is_finite():
+        return 0, number, ''
+
+    return 1, 0, value or ''
+
+
+@total_ordering
+class Descending(object):
+    """
+    Key reversing the order of the key given.
+    """
+
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __ne__(self, other):
+        return self.key != other.key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+class Query(object):
+    """
+    Compiled oslc.where, the equalities on a column are given as
+    the filter of the repository, for using its indexes, the other
+    terms are checked by the predicate on each specification.
+
+    The predicate is the query itself, so the stores able to
+    evaluate the terms, kept with their tests, can read them.
+    """
+
+    def __init__(self):
+        self.filter = dict()
+        self.conditions = list()
+        self.terms = list()
+        self.empty = False
+
+    @property
+    def columns(self):
+        return set(self.filter) | set(column for column, _ in self.conditions)
+
+    @property
+    def predicate(self):
+        return self if self.conditions else None
+
+    def matches(self, specification):
+        return all(test(specification.get(column)) for column, test in self.conditions)
+
+    __call__ = matches
+
+    def add(self, column, op, value):
+        if op == '=' and (isinstance(value, URIRef) or value.datatype in (None, XSD.string)):
+            value = six.text_type(value)
+            if self.filter.get(column, value) != value:
+                self.empty = True
+            self.filter[column] = value
+
+        elif op == 'in':
+            tests = [comparison('=', v) for v in value]
+            self.conditions.append((column, lambda v: any(test(v) for test in tests)))
+            self.terms.append((column, op, value))
+
+        else:
+            self.conditions.append((column, comparison(op, value)))
+            self.terms.append((column, op, value))
+
+
+class Selection(object):
+    """
+    Compiled oslc.select, the properties emitted for each
+    requirement and the columns needed for them, both
+    are None when all the properties are selected.
+    """
+
+    def __init__(self, properties=None, columns=None):
+        self.properties = properties
+        self.columns = columns
+
+
+class Order(object):
+    """
+    Compiled oslc.orderBy, the columns with the direction of each
+    sort key, the identifier is always the last key so the order
+    is the same on every request.
+
+    The results of a search are ordered by their score first,
+    the cursor of a page is the list of the score and the
+    values of the keys of the last requirement, as JSON.
+    """
+
+    def __init__(self, keys=None):
+        self.keys = list(keys or ())
+        if not self.keys or self.keys[-1][0] != 'Specification_id':
+            self.keys.append(('Specification_id', False))
+
+    @property
+    def columns(self):
+        return [column for column, _ in self.keys]
+
+    def component(self, position, value):
+        column, descending = self.keys[position]
+        key = (value or '') if column == 'Specification_id' else sort_value(value)
+        return Descending(key) if descending else key
+
+    def key(self, specification, score=None):
+        key = tuple(self.component(position, specification.get(column))
+                    for position, (column, _) in enumerate(self.keys))
+        return key if score is None else (-score,) + key
+
+    def cursor(self, specification, score=None):
+        values = [specification.get(column) for column in self.columns]
+        return json.dumps(values if score is None else [score] + values)
+
+    def after(self, cursor, ranked=False):
+        """
+        Returns the key of the cursor, raises
+        QueryError when it is not valid.
+        """
+        try:
+            values = json.loads(cursor)
+        except ValueError:
+            values = None
+
+        if not isinstance(values, list) or len(values) != len(self.keys) + ranked or \
+                ranked and not isinstance(values[0], (six.integer_types, float)):
+            raise QueryError('Invalid cursor for the order: {}'.format(cursor))
+
+        if ranked:
+            return self.key(dict(zip(self.columns, values[1:])), values[0])
+
+        return self.key(dict(zip(self.columns, values)))
+
+
+def specification_of(requirement):
+    """
+    Returns the values of the columns of the
+    specification of the requirement.
+    """
+    return requirement.to_mapped_object(specification_map)
+
+
+_columns = property_columns(specification_map)
+_queries = LRUCache(256)
+
+
+def compile_where(where, prefixes=None):
+    """
+    Returns the Query for the oslc.where and oslc.prefix parameters,
+    the queries are compiled once and kept on a cache.
+    """
+    key = ('where', where or '', prefixes or '')
+    query = _queries.get(key)
+    if query is None:
+        query = Query()
+        for term in parse_where(where, parse_prefixes(prefixes)):
+            if term.operator == '{}' or term.property == '*':
+                raise QueryError('Nested properties and wildcards are not supported: {}'.format(term.property))
+
+            if term.property == RDF.type:
+                types = term.value if term.operator == 'in' else [term.value]
+                if (OSLC_RM.Requirement in types) != (term.operator != '!='):
+                    query.empty = True
+                continue
+
+            column = _columns.get(term.property)
+            if column is None:
+                raise QueryError('Unknown property: {}'.format(term.property))
+
+            query.add(column, term.operator, term.value)
+
+        _queries.put(key, query)
+
+    return query
+
+
+def compile_select(select, prefixes=None):
+    """
+    Returns the Selection for the oslc.select and oslc.prefix
+    parameters, the identifier is always read since it gives
+    the URI of the requirement, the properties not mapped are
+    ignored and so the nested properties since the values of
+    the mapped properties are literals.
+    """
+    key = ('select', select or '', prefixes or '')
+    selection = _queries.get(key)
+    if selection is None:
+        properties = parse_select(select, parse_prefixes(prefixes))
+        if not properties or '*' in properties:
+            selection = Selection()
+        else:
+            columns = set(_columns[p] for p in properties if p in _columns)
+            selection = Selection(set(properties), sorted(columns | {'Specification_id'}))
+
+        _queries.put(key, selection)
+
+    return selection
+
+
+def compile_order(order_by, prefixes=None):
+    """
+    Returns the Order for the oslc.orderBy and oslc.prefix
+    parameters, None when there is no order.
+    """
+    key = ('order', order_by or '', prefixes or '')
+    order = _queries.get(key)
+    if order is None:
+        keys = list()
+        for term in parse_order_by(order_by, parse_prefixes(prefixes)):
+            if term.direction not in ('+', '-'):
+                raise QueryError('Nested properties are not supported: {}'.format(term.property))
+
+            column = _columns.get(term.property)
+            if column is None:
+                raise QueryError('Unknown property: {}'.format(term.property))
+
+            keys.append((column, term.direction == '-'))
+
+        order = Order(keys) if keys else False
+        _queries.put(key, order)
+
+    return order or None
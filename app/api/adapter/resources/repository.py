@@ -1,7 +1,232 @@
-class Repository(object):
-
-    def __init__(self, title):
-        self.title = title
-
-    def get(self):
-        pass
+import heapq
+from operator import itemgetter
+
+import six
+
+from app.api.adapter.resources.query import Order, specification_of
+from app.api.adapter.resources.text import TextIndex, matches
+
+
+def top(items, limit, key=None):
+    """
+    Returns the first items by the key, keeping only
+    limit items in memory, all sorted when None.
+    """
+    if limit is None:
+        return sorted(items, key=key)
+
+    return heapq.nsmallest(limit, items, key=key)
+
+
+def ranked(items, after, limit, order):
+    """
+    Returns the first values with their score of the tuples
+    of score, specification and value, by descending score
+    and then by the order, after the key given.
+    """
+    keyed = ((order.key(specification, score), value, score) for score, specification, value in items)
+    keyed = (item for item in keyed if after is None or item[0] > after)
+
+    return [(value, score) for _, value, score in top(keyed, limit, key=itemgetter(0))]
+
+
+class Repository(object):
+    """
+    Interface for the stores of the requirements, the requirements
+    are written as specifications, the mapped objects using the
+    columns of the specification as keys.
+
+    The batch methods allow the implementations to read or write
+    several requirements with a single access to the store.
+    """
+
+    def __init__(self, title):
+        self.title = title
+        self._text_cache = None
+
+    def get(self):
+        pass
+
+    def watch(self, watcher):
+        """
+        Registers the files of the store on the watcher for
+        refreshing the requirements when they change.
+        """
+        pass
+
+    def current_version(self):
+        """
+        Returns a value changing on each write of the requirements,
+        including the writes of other processes, for knowing whether
+        a result is still valid, None when the store has no version.
+        """
+        return None
+
+    def find(self, requirement_id):
+        """
+        Returns the requirement with the identifier or None.
+        """
+        raise NotImplementedError()
+
+    def find_many(self, requirement_ids):
+        """
+        Returns the requirements found for the identifiers,
+        in the same order of the identifiers.
+        """
+        requirements = list()
+        for requirement_id in requirement_ids:
+            requirement = self.find(requirement_id)
+            if requirement is not None:
+                requirements.append(requirement)
+
+        return requirements
+
+    def iter(self, filter=None, fields=None, predicate=None):
+        """
+        Yields the requirements selected by the filter, a dict with the
+        values of the columns of the specification, the fields are
+        the columns loaded on each requirement, all by default.
+
+        The predicate, when given, is called with the specification
+        of each requirement selected by the filter.
+        """
+        raise NotImplementedError()
+
+    def page(self, filter=None, after=None, limit=100, fields=None, predicate=None, order=None):
+        """
+        Returns up to limit requirements selected by the filter and the
+        predicate, all when limit is None, ordered by identifier or by
+        the Order given, starting after the identifier, or the key
+        of the order, of the last requirement of the previous page.
+
+        The requirements are kept on a heap of the limit size
+        instead of sorting all the requirements selected.
+        """
+        if order is None:
+            def key(requirement):
+                return six.text_type(requirement.identifier)
+        else:
+            def key(requirement):
+                return order.key(specification_of(requirement))
+
+        keyed = ((key(requirement), requirement) for requirement in self.iter(filter, fields, predicate))
+        keyed = (item for item in keyed if after is None or item[0] > after)
+
+        return [requirement for _, requirement in top(keyed, limit, key=itemgetter(0))]
+
+    def search(self, terms, fields=None, after=None):
+        """
+        Yields the requirements with each word of the terms at the
+        beginning of a word of the identifier, title or description,
+        ordered by identifier starting after the identifier given.
+        """
+        for requirement in self.iter():
+            if after is not None and six.text_type(requirement.identifier) <= after:
+                continue
+            if matches(terms, (requirement.identifier, requirement.title, requirement.description)):
+                yield requirement
+
+    def text_index(self):
+        """
+        Returns the text index of the identifier, title and description
+        of all the requirements, kept while the version of the store
+        is the same, built for each search when it has no version.
+        """
+        version = self.current_version()
+        cached = self._text_cache
+        if version is not None and cached is not None and cached[0] == version:
+            return cached[1]
+
+        index = TextIndex()
+        for requirement_id, values in self.iter_text():
+            index.add(requirement_id, values)
+
+        self._text_cache = (version, index)
+        return index
+
+    def iter_text(self):
+        """
+        Yields the identifier of each requirement with the
+        values of its identifier, title and description.
+        """
+        for requirement in self.iter(fields=['Title', 'Description']):
+            yield six.text_type(requirement.identifier), (requirement.identifier, requirement.title,
+                                                          requirement.description)
+
+    def select_ids(self, filter=None, predicate=None):
+        """
+        Returns the set of the identifiers of the requirements
+        selected by the filter and the predicate.
+        """
+        return set(six.text_type(r.identifier) for r in self.iter(filter, ['Specification_id'], predicate))
+
+    def rank(self, terms, filter=None, after=None, limit=100, fields=None, predicate=None, order=None):
+        """
+        Returns up to limit tuples of a requirement found by the search
+        of the terms, selected by the filter and the predicate, and its
+        BM25 score, by descending score and then by the order, starting
+        after the key of the last requirement of the previous page.
+
+        Only the requirements found by the search are read from the
+        store, the text index is kept for the version of the store.
+        """
+        order = order or Order()
+        index = self.text_index()
+        ids = index.search(terms)
+        if filter or predicate is not None:
+            ids &= self.select_ids(filter, predicate)
+
+        scores = index.scores(terms, ids)
+        requirements = self.find_many(sorted(scores))
+        items = ((scores[six.text_type(requirement.identifier)], specification_of(requirement), requirement)
+                 for requirement in requirements)
+
+        return ranked(items, after, limit, order)
+
+    def count(self, filter=None, predicate=None, terms=None):
+        """
+        Returns the number of requirements selected by the filter
+        and the predicate, found by the search of the terms when
+        given, without reading more than their identifiers
+        when the store allows it.
+        """
+        if terms:
+            ids = self.text_index().search(terms)
+            return len(ids & self.select_ids(filter, predicate) if filter or predicate is not None else ids)
+
+        return sum(1 for _ in self.iter(filter, fields=['Specification_id'], predicate=predicate))
+
+    def create(self, specification):
+        """
+        Adds the specification, returns False when
+        the Specification_id already exists.
+        """
+        raise NotImplementedError()
+
+    def update(self, requirement_id, specification):
+        """
+        Replaces the specification, returns False when
+        the requirement does not exist.
+        """
+        raise NotImplementedError()
+
+    def delete(self, requirement_id):
+        """
+        Removes the requirement, returns False when
+        the requirement does not exist.
+        """
+        raise NotImplementedError()
+
+    def bulk_upsert(self, specifications):
+        """
+        Adds or replaces the specifications, returns
+        the number of specifications written.
+        """
+        raise NotImplementedError()
+
+    def bulk_delete(self, requirement_ids):
+        """
+        Removes the requirements, returns the number
+        of requirements removed.
+        """
+        raise NotImplementedError()
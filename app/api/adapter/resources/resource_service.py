@@ -35,3 +35,12 @@ def get_service_resources(kind):
         raise ServiceResourceException(
             "No Service Resource registered for (%s)" % kind)
     return [r.get_class() for r in rs]
+
+
+def get_service_resource(name, kind):
+    try:
+        srd = _service_resources[(name, kind)]
+    except KeyError:
+        raise ServiceResourceException(
+            "No Service Resource registered for (%s, %s)" % (name, kind))
+    return srd.get_class()
@@ -0,0 +1,175 @@
+import math
+import re
+from bisect import bisect_left
+
+import six
+
+_token = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """
+    Returns the words of the text in lower case.
+    """
+    if not text:
+        return list()
+    return _token.findall(text.lower())
+
+
+def matches(terms, texts):
+    """
+    Returns whether each word of the terms is the
+    beginning of a word of the texts.
+    """
+    words = set()
+    for text in texts:
+        words.update(tokenize(text))
+
+    return all(any(word.startswith(term) for word in words) for term in tokenize(terms))
+
+
+def bm25(frequency, documents, length, count, average_length, k1=1.2, b=0.75):
+    """
+    Returns the BM25 score of a word found frequency times on a
+    requirement of the length given, when documents of the count
+    requirements contain the word.
+    """
+    idf = math.log(1 + (count - documents + 0.5) / (documents + 0.5))
+    norm = 1 - b + b * length / average_length if average_length else 1
+    return idf * frequency * (k1 + 1) / (frequency + k1 * norm)
+
+
+class TextIndex(object):
+    """
+    Inverted index of the words of the requirements, each word
+    has the number of times it is found on each requirement
+    containing it, by the id of the requirement.
+
+    The words of the terms are searched as the beginning of the
+    words of the requirements, using a sorted vocabulary,
+    which is sorted again only after adding new words.
+    """
+
+    def __init__(self):
+        self.postings = dict()
+        self.words = dict()
+        self.lengths = dict()
+        self.total_length = 0
+        self._vocabulary = None
+
+    def add(self, requirement_id, texts):
+        self.remove(requirement_id)
+
+        words = list()
+        for text in texts:
+            words.extend(tokenize(text))
+
+        for word in words:
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = dict()
+                self._vocabulary = None
+            ids[requirement_id] = ids.get(requirement_id, 0) + 1
+
+        self.words[requirement_id] = frozenset(words)
+        self.lengths[requirement_id] = len(words)
+        self.total_length += len(words)
+
+    def remove(self, requirement_id):
+        for word in self.words.pop(requirement_id, ()):
+            ids = self.postings[word]
+            ids.pop(requirement_id, None)
+            if not ids:
+                del self.postings[word]
+                self._vocabulary = None
+
+        self.total_length -= self.lengths.pop(requirement_id, 0)
+
+    def vocabulary(self):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        return self._vocabulary
+
+    def expand(self, term):
+        """
+        Returns the words beginning with the term.
+        """
+        vocabulary = self.vocabulary()
+        position = bisect_left(vocabulary, term)
+
+        words = list()
+        while position < len(vocabulary) and vocabulary[position].startswith(term):
+            words.append(vocabulary[position])
+            position += 1
+
+        return words
+
+    def prefixed(self, term):
+        """
+        Returns the ids of the requirements with a word
+        beginning with the term.
+        """
+        ids = set()
+        for word in self.expand(term):
+            ids.update(self.postings[word])
+
+        return ids
+
+    def search(self, terms):
+        """
+        Returns the ids of the requirements containing all the words
+        of the terms, starting from the word with fewer ids.
+        """
+        groups = sorted((self.prefixed(term) for term in set(tokenize(terms))), key=len)
+        if not groups:
+            return set(six.iterkeys(self.words))
+
+        ids = groups[0]
+        for group in groups[1:]:
+            if not ids:
+                break
+            ids &= group
+
+        return ids
+
+    def statistics(self, terms):
+        """
+        Returns the number of requirements, the sum of their lengths
+        and the number of requirements containing each word
+        beginning with the words of the terms.
+        """
+        documents = dict()
+        for term in set(tokenize(terms)):
+            for word in self.expand(term):
+                documents[word] = len(self.postings[word])
+
+        return len(self.lengths), self.total_length, documents
+
+    def scores(self, terms, ids, statistics=None):
+        """
+        Returns the BM25 score of each one of the ids, the score of
+        a word of the terms is the best score of the words beginning
+        with it, the statistics of other indexes can be given for
+        scoring the ids of several indexes in the same way.
+        """
+        count, total_length, documents = statistics or self.statistics(terms)
+        average_length = float(total_length) / count if count else 0.0
+
+        scores = dict((requirement_id, 0.0) for requirement_id in ids)
+        for term in set(tokenize(terms)):
+            best = dict()
+            for word in self.expand(term):
+                postings = self.postings[word]
+                found = postings if len(postings) < len(scores) else scores
+                for requirement_id in found:
+                    frequency = postings.get(requirement_id)
+                    if frequency and requirement_id in scores:
+                        score = bm25(frequency, documents.get(word, len(postings)),
+                                     self.lengths[requirement_id], count, average_length)
+                        if score > best.get(requirement_id, 0.0):
+                            best[requirement_id] = score
+
+            for requirement_id, score in six.iteritems(best):
+                scores[requirement_id] += score
+
+        return scores
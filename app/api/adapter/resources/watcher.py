@@ -0,0 +1,209 @@
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class FileWatcher(object):
+    """
+    Watches files for changes made by this or other processes,
+    the callbacks registered for a file are called with the
+    path of the file from the thread of the watcher.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.callbacks = dict()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def add(self, path, callback):
+        path = os.path.abspath(path)
+        with self._lock:
+            self.callbacks.setdefault(path, list()).append(callback)
+        self.watch(path)
+
+    def watch(self, path):
+        pass
+
+    def notify(self, path):
+        with self._lock:
+            callbacks = list(self.callbacks.get(path, ()))
+
+        for callback in callbacks:
+            try:
+                callback(path)
+            except Exception:
+                logger.exception('Error notifying the change of {}'.format(path))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='watcher-' + type(self).__name__)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run(self):
+        raise NotImplementedError()
+
+
+class PollingWatcher(FileWatcher):
+    """
+    Watcher comparing the size, inode and modification
+    time of the files on each interval.
+    """
+
+    def __init__(self, interval=1.0):
+        super(PollingWatcher, self).__init__(interval)
+        self.signatures = dict()
+
+    @staticmethod
+    def signature(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime
+
+    def watch(self, path):
+        with self._lock:
+            self.signatures[path] = self.signature(path)
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            with self._lock:
+                paths = list(self.signatures)
+
+            for path in paths:
+                signature = self.signature(path)
+                if signature != self.signatures[path]:
+                    self.signatures[path] = signature
+                    self.notify(path)
+
+
+class InotifyWatcher(FileWatcher):
+    """
+    Watcher using the inotify interface of Linux, the directory of
+    each file is watched so the files replaced by a rename
+    or created after the watch are also notified.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    mask = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    event = struct.Struct('iIII')
+
+    def __init__(self, interval=1.0):
+        super(InotifyWatcher, self).__init__(interval)
+        library = ctypes.util.find_library('c')
+        if library is None:
+            raise OSError(errno.ENOSYS, 'The C library was not found')
+
+        self.libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(self.libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        self.directories = dict()
+
+    def watch(self, path):
+        directory = os.path.dirname(path)
+        with self._lock:
+            if directory in self.directories.values():
+                return
+
+            descriptor = self.libc.inotify_add_watch(self.fd, directory.encode('utf-8'), self.mask)
+            if descriptor < 0:
+                raise OSError(ctypes.get_errno(), 'inotify_add_watch failed for {}'.format(directory))
+
+            self.directories[descriptor] = directory
+
+    def run(self):
+        try:
+            while not self._stopped.is_set():
+                readable, _, _ = select.select([self.fd], [], [], self.interval)
+                if readable:
+                    for path in self.read():
+                        self.notify(path)
+        finally:
+            os.close(self.fd)
+
+    def read(self):
+        """
+        Returns the watched paths changed on the events
+        available, each path once, all the watched paths
+        when events were lost by an overflow of the queue.
+        """
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return list()
+            raise
+
+        paths = list()
+        position = 0
+        while position + self.event.size <= len(data):
+            descriptor, mask, cookie, length = self.event.unpack_from(data, position)
+            position += self.event.size
+            name = data[position:position + length].rstrip(b'\0').decode('utf-8')
+            position += length
+
+            directory = self.directories.get(descriptor)
+            if mask & self.IN_Q_OVERFLOW or directory is None:
+                # The changes of any file may have been lost
+                with self._lock:
+                    return list(self.callbacks)
+
+            if name:
+                path = os.path.join(directory, name)
+                if path in self.callbacks and path not in paths:
+                    paths.append(path)
+
+        return paths
+
+
+def create_watcher(kind, interval=1.0):
+    """
+    Returns a started watcher of the kind, inotify or poll,
+    falling back to polling when inotify is not available,
+    None for any other kind.
+    """
+    if kind == 'inotify':
+        try:
+            watcher = InotifyWatcher(interval)
+        except (OSError, AttributeError) as e:
+            logger.warning('Using a polling watcher: {}'.format(e))
+            watcher = PollingWatcher(interval)
+    elif kind == 'poll':
+        watcher = PollingWatcher(interval)
+    else:
+        return None
+
+    watcher.start()
+    return watcher
@@ -19,6 +19,16 @@ class Config(object):
 
     OAUTH_CACHE_DIR = '_cache'
 
+    # Store of the requirements: csv, compact (csv file loaded by columns),
+    # mmap (csv file read through an index), sharded (one csv file per project)
+    # or sql (using the SQLALCHEMY_DATABASE_URI)
+    REQUIREMENT_REPOSITORY = os.environ.get('REQUIREMENT_REPOSITORY', 'csv')
+
+    # Watcher of the changes on the files of the requirements:
+    # inotify (falls back to poll when not available), poll or empty
+    # for checking the files on each access
+    REQUIREMENT_WATCHER = os.environ.get('REQUIREMENT_WATCHER', 'inotify')
+
     MAIL_SERVER = None,
     LOG_TO_STDOUT = None,
 
@@ -0,0 +1,286 @@
+import re
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from rdflib import RDF, RDFS, XSD, Literal, URIRef
+from rdflib.namespace import DCTERMS, FOAF
+
+from pyoslc.vocabularies.core import OSLC
+from pyoslc.vocabularies.rm import OSLC_RM
+
+# Prefixes available on the queries without declaring them on oslc.prefix
+PREFIXES = {
+    'rdf': str(RDF),
+    'rdfs': str(RDFS),
+    'xsd': str(XSD),
+    'dcterms': str(DCTERMS),
+    'foaf': str(FOAF),
+    'oslc': str(OSLC),
+    'oslc_rm': str(OSLC_RM),
+}
+
+Term = namedtuple('Term', ['property', 'operator', 'value'])
+SortTerm = namedtuple('SortTerm', ['property', 'direction'])
+
+
+class QueryError(ValueError):
+    """
+    Raised when a parameter of the OSLC query syntax is not valid.
+    """
+    pass
+
+
+_token = re.compile(r'''
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*")
+      | (?P<uri><[^<>"\s]*>)
+      | (?P<operator>!=|<=|>=|=|<|>)
+      | (?P<punctuation>\^\^|[\[\]{},])
+      | (?P<language>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+      | (?P<number>[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<name>\*|[A-Za-z_][\w.-]*:[\w.-]*|[A-Za-z_]\w*)
+      | (?P<sign>[+-])
+    )''', re.VERBOSE | re.UNICODE)
+
+
+def tokenize(text):
+    tokens = list()
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _token.match(text, position)
+        if match is None or match.end() == position:
+            raise QueryError('Unexpected character at position {}: {}'.format(position, text[position:]))
+
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+
+    return tokens
+
+
+def normalize(text):
+    """
+    Returns the text of a query parameter with the tokens
+    separated by one space, raises QueryError when the
+    text has an invalid token.
+    """
+    return ' '.join(token for _, token in tokenize(text or ''))
+
+
+def parse_prefixes(text):
+    """
+    Returns the prefixes declared on the oslc.prefix parameter,
+    e.g. dcterms=<http://purl.org/dc/terms/>, added to
+    the default prefixes.
+    """
+    prefixes = dict(PREFIXES)
+    if not text:
+        return prefixes
+
+    for declaration in re.split(r',(?=\s*[A-Za-z_][\w.-]*\s*=)', text):
+        match = re.match(r'^\s*([A-Za-z_][\w.-]*)\s*=\s*<([^<>"\s]*)>\s*$', declaration)
+        if match is None:
+            raise QueryError('Invalid prefix declaration: {}'.format(declaration))
+        prefixes[match.group(1)] = match.group(2)
+
+    return prefixes
+
+
+class QueryParser(object):
+    """
+    Base of the parsers of the query parameters, the prefixed
+    names are expanded using the prefixes given.
+    """
+
+    def __init__(self, text, prefixes=None):
+        self.tokens = tokenize(text or '')
+        self.position = 0
+        self.prefixes = prefixes if prefixes is not None else PREFIXES
+
+    def parse(self):
+        if not self.tokens:
+            return self.empty()
+
+        result = self.root()
+        if self.position < len(self.tokens):
+            raise QueryError('Unexpected token: {}'.format(self.tokens[self.position][1]))
+        return result
+
+    def empty(self):
+        raise NotImplementedError()
+
+    def root(self):
+        raise NotImplementedError()
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def next(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            raise QueryError('Expected {} but found {}'.format(value or kind, token[1] or 'the end of the query'))
+        self.position += 1
+        return token[1]
+
+    def identifier(self, name):
+        if name == '*':
+            return name
+        return self.expand(name)
+
+    def expand(self, name):
+        prefix, _, local = name.partition(':')
+        if not _ or prefix not in self.prefixes:
+            raise QueryError('Unknown prefix on {}'.format(name))
+        return URIRef(self.prefixes[prefix] + local)
+
+
+class WhereParser(QueryParser):
+    """
+    Parser for the oslc.where parameter, returns the terms joined by
+    "and" as a list of Term, the value of a term is a list for the
+    "in" operator and a list of terms for the nested properties.
+    """
+
+    def empty(self):
+        return list()
+
+    def root(self):
+        return self.compound_term()
+
+    def compound_term(self):
+        terms = [self.simple_term()]
+        while self.peek() == ('name', 'and'):
+            self.next()
+            terms.append(self.simple_term())
+        return terms
+
+    def simple_term(self):
+        identifier = self.identifier(self.next('name'))
+        kind, value = self.peek()
+
+        if kind == 'operator':
+            return Term(identifier, self.next(), self.value())
+
+        if (kind, value) == ('name', 'in'):
+            self.next()
+            self.next('punctuation', '[')
+            values = [self.value()]
+            while self.peek() == ('punctuation', ','):
+                self.next()
+                values.append(self.value())
+            self.next('punctuation', ']')
+            return Term(identifier, 'in', values)
+
+        if (kind, value) == ('punctuation', '{'):
+            self.next()
+            terms = self.compound_term()
+            self.next('punctuation', '}')
+            return Term(identifier, '{}', terms)
+
+        raise QueryError('Expected an operator after {}'.format(identifier))
+
+    def value(self):
+        kind, token = self.peek()
+        if kind is None:
+            raise QueryError('Expected a value but found the end of the query')
+        self.next()
+
+        if kind == 'uri':
+            return URIRef(token[1:-1])
+
+        if kind == 'number':
+            try:
+                number = Decimal(token)
+            except InvalidOperation:
+                raise QueryError('Invalid number: {}'.format(token))
+            return Literal(int(number) if number == number.to_integral_value() and '.' not in token else number)
+
+        if kind == 'name' and token in ('true', 'false'):
+            return Literal(token == 'true')
+
+        if kind == 'name' and ':' in token:
+            return self.expand(token)
+
+        if kind == 'string':
+            text = re.sub(r'\\(.)', r'\1', token[1:-1])
+            if self.peek() == ('punctuation', '^^'):
+                self.next()
+                return Literal(text, datatype=self.expand(self.next('name')))
+            if self.peek()[0] == 'language':
+                return Literal(text, lang=self.next()[1:])
+            return Literal(text)
+
+        raise QueryError('Invalid value: {}'.format(token))
+
+
+def parse_where(text, prefixes=None):
+    return WhereParser(text, prefixes).parse()
+
+
+class SelectParser(QueryParser):
+    """
+    Parser for the oslc.select parameter, returns a dict with the
+    selected properties (or the "*" wildcard) and, for each one,
+    the dict of the nested properties or None.
+    """
+
+    def empty(self):
+        return dict()
+
+    def root(self):
+        return self.properties()
+
+    def properties(self):
+        properties = dict()
+        while True:
+            identifier = self.identifier(self.next('name'))
+            nested = None
+            if self.peek() == ('punctuation', '{'):
+                self.next()
+                nested = self.properties()
+                self.next('punctuation', '}')
+            properties[identifier] = nested
+
+            if self.peek() != ('punctuation', ','):
+                return properties
+            self.next()
+
+
+def parse_select(text, prefixes=None):
+    return SelectParser(text, prefixes).parse()
+
+
+class OrderByParser(QueryParser):
+    """
+    Parser for the oslc.orderBy parameter, returns the list of
+    SortTerm, the direction of a term is "+" or "-", and the
+    list of the sort terms for the nested properties.
+    """
+
+    def empty(self):
+        return list()
+
+    def root(self):
+        return self.sort_terms()
+
+    def sort_terms(self):
+        terms = [self.sort_term()]
+        while self.peek() == ('punctuation', ','):
+            self.next()
+            terms.append(self.sort_term())
+        return terms
+
+    def sort_term(self):
+        if self.peek()[0] == 'sign':
+            direction = self.next()
+            return SortTerm(self.expand(self.next('name')), direction)
+
+        identifier = self.expand(self.next('name'))
+        self.next('punctuation', '{')
+        terms = self.sort_terms()
+        self.next('punctuation', '}')
+        return SortTerm(identifier, terms)
+
+
+def parse_order_by(text, prefixes=None):
+    return OrderByParser(text, prefixes).parse()
@@ -4,6 +4,7 @@ from rdflib import RDF, Literal
 from rdflib.extras.describer import Describer
 from rdflib.namespace import DCTERMS
 
+from pyoslc.resources.mapping import compile_mapping
 from pyoslc.resources.models import BaseResource
 from pyoslc.vocabularies.core import OSLC
 from pyoslc.vocabularies.rm import OSLC_RM
@@ -42,23 +43,28 @@ class Requirement(BaseResource):
 
     def update(self, data, attributes):
         assert attributes is not None, 'The mapping for attributes is required'
-        for k, v in data.items():
-            if k in attributes:
-                attribute_name = attributes[k]['attribute']
-                if hasattr(self, attribute_name):
-                    attribute_value = getattr(self, attribute_name)
-                    if isinstance(attribute_value, set):
-                        attribute_value.clear()
-                        attribute_value.add(data[k])
-                    else:
-                        setattr(self, attribute_name, data[k])
+        mapping = compile_mapping(attributes, type(self))
+        for k, v in six.iteritems(data):
+            item = mapping.keys.get(k)
+            if item is not None:
+                attribute_value = getattr(self, item.attribute)
+                if isinstance(attribute_value, set):
+                    attribute_value.clear()
+                    attribute_value.add(v)
+                else:
+                    setattr(self, item.attribute, v)
 
     @staticmethod
     def get_absolute_url(base_url, identifier):
         return base_url + "/" + identifier
 
-    def to_rdf(self, graph, base_url=None, attributes=None):
+    def to_rdf(self, graph, base_url=None, attributes=None, properties=None):
+        """
+        Adds the statements of the requirement to the graph, only the
+        predicates within the properties are added when given.
+        """
         assert attributes is not None, 'The mapping for attributes is required'
+        mapping = compile_mapping(attributes, type(self))
 
         graph.bind('oslc_rm', OSLC_RM)
         graph.bind('oslc', OSLC)
@@ -73,128 +79,88 @@ class Requirement(BaseResource):
         d.about(base_url)
         d.rdftype(OSLC_RM.Requirement)
 
-        for attribute_key in self.__dict__.keys():
-            item = {v['attribute']: v['oslc_property'] for k, v in six.iteritems(attributes) if
-                    attribute_key == v['attribute']}
-
-            if item and attribute_key in item.keys():
-                predicate = eval(item.get(attribute_key))
-                attr = getattr(self, attribute_key)
-                if isinstance(attr, set):
-                    if len(attr) > 0:
-                        val = attr.pop()
-                        if isinstance(val, Literal):
-                            d.value(predicate, val.value)
-                        else:
-                            d.value(predicate, val)
-                        attr.add(val)
-                    else:
-                        attr = getattr(self, attribute_key)
-                        val = attr.pop()
-                        d.value(predicate, val)
-                elif isinstance(attr, Literal):
-                    data = getattr(self, attribute_key)
-                    d.value(predicate, data.value)
-                else:
-                    d.value(predicate, getattr(self, attribute_key))
+        for item in mapping:
+            if properties is not None and item.predicate not in properties:
+                continue
+
+            attr = getattr(self, item.attribute)
+            if isinstance(attr, set):
+                for val in attr:
+                    d.value(item.predicate, val.value if isinstance(val, Literal) else val)
+            elif isinstance(attr, Literal):
+                d.value(item.predicate, attr.value)
+            else:
+                d.value(item.predicate, attr)
 
         return graph
 
     def from_json(self, data, attributes):
+        mapping = compile_mapping(attributes, type(self))
         for key in six.iterkeys(data):
-            item = {key: b for a, b in six.iteritems(attributes) if a.lower() == key.lower()}
-
-            if item:
-                attribute_name = item[key]['attribute']
-                if hasattr(self, attribute_name):
-                    attribute_value = getattr(self, attribute_name)
-                    if isinstance(attribute_value, set):
-                        attr = getattr(self, attribute_name)
-                        attr.add(data[key])
-                    else:
-                        setattr(self, attribute_name, data[key])
-
-    def from_rdf(self, g, attributes):
-
-        for r in g.subjects(RDF.type, OSLC_RM.Requirement):
-
-            setattr(self, '_AbstractResource__about', str(r))
-
-            reviewed = list()
-
-            for k, v in six.iteritems(attributes):
-                reviewed.append(v['attribute'])
-                item = {v['attribute']: a for a in self.__dict__.keys() if a.lower() == v['attribute'].lower()}
-                predicate = None
-                if item:
-                    try:
-                        predicate = eval(v['oslc_property'])
-                    except AttributeError:
-                        pass
+            item = mapping.names.get(key.lower())
+            if item is not None:
+                attribute_value = getattr(self, item.attribute)
+                if isinstance(attribute_value, set):
+                    attribute_value.add(data[key])
                 else:
-                    ns, ln = v['oslc_property'].split('.')
-                    predicate = eval(ns).uri + ln
-
-                for i in g.objects(r, predicate=predicate):
-                    attribute_name = v['attribute']
-                    if hasattr(self, attribute_name):
-                        attribute_value = getattr(self, attribute_name)
-                        if isinstance(attribute_value, set):
-                            at = getattr(self, attribute_name)
-                            if isinstance(i, Literal):
-                                i = i.value
-                            at.add(i)
-                        elif isinstance(attribute_value, str):
-                            if isinstance(i, Literal):
-                                i = i.value
-                            setattr(self, attribute_name, i)
-                        else:
-                            if isinstance(i, Literal):
-                                setattr(self, attribute_name, i.value)
-                            else:
-                                setattr(self, attribute_name, i)
-
-            no_reviewed = [a for a in self.__dict__.keys() if a not in reviewed]
-
-            for attr in no_reviewed:
-                item = {attr: v for k, v in six.iteritems(attributes) if v['attribute'].lower() == attr.lower()}
-
-                if item:
-                    for i in g.objects(r, eval(item.get(attr)['oslc_property'])):
-                        attribute_name = item.get(attr)['attribute']
-                        if hasattr(self, attribute_name):
-                            attribute_value = getattr(self, attribute_name)
-                            if isinstance(attribute_value, set):
-                                attribute_value.clear()
-                                # attribute_value.add(data[key])
-                            else:
-                                setattr(self, attribute_name, i)
+                    setattr(self, item.attribute, data[key])
+
+    def from_rdf(self, g, attributes, subject=None):
+        """
+        Reads the statements of the subject given, or of the first
+        requirement of the graph, mapping the predicates to the
+        attributes with the compiled mapping.
+        """
+        mapping = compile_mapping(attributes, type(self))
+        if subject is None:
+            subjects = sorted(g.subjects(RDF.type, OSLC_RM.Requirement))
+            if not subjects:
+                return
+            subject = subjects[0]
+
+        setattr(self, '_AbstractResource__about', str(subject))
+
+        for predicate, value in g.predicate_objects(subject):
+            item = mapping.predicates.get(predicate)
+            if item is None:
+                continue
+
+            if isinstance(value, Literal):
+                value = value.value
+            if item.multiple:
+                getattr(self, item.attribute).add(value)
+            else:
+                setattr(self, item.attribute, value)
+
+    @classmethod
+    def list_from_rdf(cls, g, attributes):
+        """
+        Returns one requirement for each subject of the
+        graph with the oslc_rm:Requirement type.
+        """
+        requirements = list()
+        for subject in sorted(set(g.subjects(RDF.type, OSLC_RM.Requirement))):
+            requirement = cls()
+            requirement.from_rdf(g, attributes, subject)
+            requirements.append(requirement)
+
+        return requirements
 
     def to_mapped_object(self, attributes):
         specification = dict()
 
-        for key in attributes:
-            attribute_name = attributes[key]['attribute']
-            if hasattr(self, attribute_name):
-                attribute_value = getattr(self, attribute_name)
-                if attribute_value:
-                    if isinstance(attribute_value, set):
-                        val = attribute_value.pop()
-                        if len(attribute_value) == 0:
-                            specification[key] = val
-                        else:
-                            try:
-                                attr = specification[key]
-                            except KeyError:
-                                specification[key] = set()
-                                attr = specification[key]
-                            attr.add(val)
-                        attribute_value.add(val)
+        for item in compile_mapping(attributes, type(self)):
+            attribute_value = getattr(self, item.attribute)
+            if attribute_value:
+                if isinstance(attribute_value, set):
+                    if len(attribute_value) == 1:
+                        specification[item.key] = next(iter(attribute_value))
                     else:
-                        if isinstance(attribute_value, Literal):
-                            specification[key] = attribute_value.value
-                        else:
-                            specification[key] = attribute_value
+                        specification[item.key] = set(attribute_value)
+                elif isinstance(attribute_value, Literal):
+                    specification[item.key] = attribute_value.value
+                else:
+                    specification[item.key] = attribute_value
 
         return specification
 
@@ -0,0 +1,78 @@
+import threading
+from collections import namedtuple
+
+from rdflib import RDF, URIRef
+from rdflib.namespace import DCTERMS
+
+from pyoslc.vocabularies.core import OSLC
+from pyoslc.vocabularies.rm import OSLC_RM
+
+# Namespaces available on the oslc_property of the mappings, e.g. DCTERMS.title
+NAMESPACES = {
+    'RDF': RDF,
+    'DCTERMS': DCTERMS,
+    'OSLC': OSLC,
+    'OSLC_RM': OSLC_RM,
+}
+
+MappedAttribute = namedtuple('MappedAttribute', ['key', 'attribute', 'predicate', 'multiple'])
+
+
+def property_uri(oslc_property):
+    """
+    Returns the URI of an oslc_property of a mapping, e.g.
+    OSLC_RM.elaboratedBy, the names not defined by a closed
+    namespace are also expanded with the URI of the namespace.
+    """
+    prefix, _, name = oslc_property.partition('.')
+    if prefix not in NAMESPACES or not name:
+        raise ValueError('Invalid property of the mapping: {}'.format(oslc_property))
+
+    return URIRef(str(NAMESPACES[prefix]) + name)
+
+
+class Mapping(tuple):
+    """
+    Mapping of the attributes of a resource class compiled once, a
+    tuple of MappedAttribute with the key of the mapping, the name of
+    the attribute, the URI of the predicate and whether the attribute
+    is a set, the attributes the class does not have are left out.
+    """
+
+    def __new__(cls, attributes, resource_class):
+        resource = resource_class()
+        items = list()
+        for key, item in sorted(attributes.items()):
+            if hasattr(resource, item['attribute']):
+                multiple = isinstance(getattr(resource, item['attribute']), set)
+                items.append(MappedAttribute(key, item['attribute'], property_uri(item['oslc_property']), multiple))
+
+        return super(Mapping, cls).__new__(cls, items)
+
+    def __init__(self, attributes, resource_class):
+        super(Mapping, self).__init__()
+        self.keys = dict((item.key, item) for item in self)
+        self.names = dict((item.key.lower(), item) for item in self)
+        self.predicates = dict((item.predicate, item) for item in self)
+
+
+_mappings = dict()
+_lock = threading.Lock()
+
+
+def compile_mapping(attributes, resource_class):
+    """
+    Returns the Mapping of the attributes for the resource class,
+    compiled the first time the mapping is used with the class.
+    """
+    if isinstance(attributes, Mapping):
+        return attributes
+
+    key = (resource_class, id(attributes))
+    compiled = _mappings.get(key)
+    if compiled is None or compiled[0] is not attributes:
+        with _lock:
+            compiled = (attributes, Mapping(attributes, resource_class))
+            _mappings[key] = compiled
+
+    return compiled[1]
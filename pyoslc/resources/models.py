@@ -1108,7 +1108,7 @@ class ResponseInfo(FilteredResource):
                  resource=None, total_count=None, next_page=None,
                  container=None):
         super(ResponseInfo, self).__init__(about, types, properties, resource)
-        self.__total_count = total_count if total_count is not None else 0
+        self.__total_count = total_count
         self.__next_page = next_page if next_page is not None else None
         self.__container = container if container is not None else None
         self.__members = list()
@@ -1137,6 +1137,14 @@ class ResponseInfo(FilteredResource):
         else:
             raise ValueError('The total_count must be an instance of int')
 
+    @property
+    def next_page(self):
+        return self.__next_page
+
+    @next_page.setter
+    def next_page(self, next_page):
+        self.__next_page = next_page
+
     @property
     def members(self):
         return self.__members
@@ -1161,9 +1169,12 @@ class ResponseInfo(FilteredResource):
                 member = Resource(graph, URIRef(item_url))
                 ri.add(RDFS.member, member)
 
-        if self.total_count and self.total_count > 0:
+        if self.total_count is not None:
             ri.add(OSLC.totalCount, Literal(self.total_count))
 
+        if self.next_page:
+            ri.add(OSLC.nextPage, URIRef(self.next_page))
+
         return ri
 
 
@@ -34,7 +34,7 @@ OSLC = ClosedNamespace(
         "partOfDiscussion", "postBody", "prefix", "prefixBase", "prefixDefinition",
         "property", "propertyDefinition", "queryable", "queryBase", "queryCapability",
         "range", "readOnly", "rel", "representation", "resourceShape", "resourceType",
-        "results", "selectionDialog", "service", "serviceProvider", "serviceProviderCatalog",
+        "results", "score", "selectionDialog", "service", "serviceProvider", "serviceProviderCatalog",
         "shortId", "shortTitle", "smallPreview", "statusCode", "totalCount", "usage",
         "valueShape", "valueType", "publisher",
         "document", "hintHeight", "hintWidth", "initialHeight", "icon",
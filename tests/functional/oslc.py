@@ -29,10 +29,11 @@ class PyOSLC:
             headers=self.headers
         )
 
-    def get_query_capability(self, service_provider):
+    def get_query_capability(self, service_provider, query=None, headers=None):
         return self._client.get(
             '/oslc/services/provider/{}/resources/requirement'.format(service_provider),
-            headers=self.headers
+            query_string=query,
+            headers=dict(self.headers, **(headers or {}))
         )
 
     def post_creation_factory(self, service_provider, payload):
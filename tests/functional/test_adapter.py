@@ -1,3 +1,4 @@
+import pytest
 from rdflib import Graph, RDF, URIRef, DCTERMS, RDFS, Literal
 
 from pyoslc.vocabularies.core import OSLC
@@ -164,6 +165,221 @@ def test_query_capability(pyoslc):
     assert m3 in members, 'The ResponseInfo does not contain the member X1C2V3B1'
 
 
+def test_query_capability_where(pyoslc):
+    """
+    GIVEN the PyOSLC API
+    WHEN requesting the query capability with the oslc.where parameter
+    THEN
+        only the requirements matching the terms should be members of the response
+        an invalid oslc.where should return a bad request
+    """
+    ri = URIRef('http://localhost/oslc/services/provider/Project-1/resources/requirement')
+
+    response = pyoslc.get_query_capability('Project-1', {
+        'oslc.where': 'dcterms:title="OSLC RM Spec 4" and oslc_rm:constrainedBy="Customer Requirement"'
+    })
+    assert response.status_code == 200
+
+    g = Graph()
+    g.parse(data=response.data, format='application/rdf+xml')
+    assert list(g.objects(ri, RDFS.member)) == [URIRef(ri + '/X1C2V3B4')]
+
+    response = pyoslc.get_query_capability('Project-1', {
+        'oslc.where': 'ex:identifier in ["X1C2V3B2","X1C2V3B3"] and rdf:type=<http://open-services.net/ns/rm#Requirement>',
+        'oslc.prefix': 'ex=<http://purl.org/dc/terms/>',
+    })
+    assert response.status_code == 200
+
+    g = Graph()
+    g.parse(data=response.data, format='application/rdf+xml')
+    assert sorted(g.objects(ri, RDFS.member)) == [URIRef(ri + '/X1C2V3B2'), URIRef(ri + '/X1C2V3B3')]
+
+    response = pyoslc.get_query_capability('Project-1', {'oslc.where': 'dcterms:title="Unknown"'})
+    assert response.status_code == 200
+
+    response = pyoslc.get_query_capability('Project-1', {'oslc.where': 'dcterms:title = '})
+    assert response.status_code == 400
+
+
+def test_query_capability_select(pyoslc):
+    """
+    GIVEN the PyOSLC API
+    WHEN requesting the query capability with the oslc.select parameter
+    THEN
+        the members should be described only with the selected properties
+        an invalid oslc.select should return a bad request
+    """
+    ri = URIRef('http://localhost/oslc/services/provider/Project-1/resources/requirement')
+    requirement = URIRef(ri + '/X1C2V3B4')
+
+    response = pyoslc.get_query_capability('Project-1', {
+        'oslc.where': 'dcterms:identifier="X1C2V3B4"',
+        'oslc.select': 'dcterms:title,oslc_rm:constrainedBy',
+    })
+    assert response.status_code == 200
+
+    g = Graph()
+    g.parse(data=response.data, format='application/rdf+xml')
+    assert list(g.objects(ri, RDFS.member)) == [requirement]
+    assert set(g.predicates(requirement)) == {RDF.type, DCTERMS.title, OSLC_RM.constrainedBy}
+    assert g.value(requirement, DCTERMS.title) == Literal('OSLC RM Spec 4')
+
+    response = pyoslc.get_query_capability('Project-1', {'oslc.select': 'dcterms:title{'})
+    assert response.status_code == 400
+
+
+def test_query_capability_paging(pyoslc):
+    """
+    GIVEN the PyOSLC API
+    WHEN requesting the query capability with the oslc.paging and oslc.pageSize parameters
+    THEN
+        each page should have the members after the ones of the previous page
+        the pages should be linked with oslc:nextPage until the last one
+        the total count should be the number of requirements of the query
+    """
+    ri = URIRef('http://localhost/oslc/services/provider/Project-1/resources/requirement')
+
+    members = list()
+    pages = 0
+    query = {'oslc.paging': 'true', 'oslc.pageSize': '2'}
+    while query is not None:
+        response = pyoslc.get_query_capability('Project-1', query)
+        assert response.status_code == 200
+        pages += 1
+
+        g = Graph()
+        g.parse(data=response.data, format='application/rdf+xml')
+        assert g.value(ri, OSLC.totalCount) == Literal(5)
+        members.extend(sorted(g.objects(ri, RDFS.member)))
+
+        next_page = g.value(ri, OSLC.nextPage)
+        query = next_page.split('?', 1)[1] if next_page else None
+
+    assert pages == 3
+    assert members == [URIRef(ri + '/X1C2V3B{}'.format(i)) for i in range(1, 6)]
+
+    response = pyoslc.get_query_capability('Project-1', {'oslc.pageSize': 'all'})
+    assert response.status_code == 400
+
+
+def test_query_capability_order_by(pyoslc):
+    """
+    GIVEN the PyOSLC API
+    WHEN requesting the query capability with the oslc.orderBy and oslc.pageSize parameters
+    THEN
+        each page should have the next members in the order requested
+        an unknown property on the oslc.orderBy should return a bad request
+    """
+    ri = URIRef('http://localhost/oslc/services/provider/Project-1/resources/requirement')
+
+    pages = list()
+    query = {'oslc.orderBy': '-dcterms:title', 'oslc.pageSize': '2'}
+    while query is not None:
+        response = pyoslc.get_query_capability('Project-1', query)
+        assert response.status_code == 200
+
+        g = Graph()
+        g.parse(data=response.data, format='application/rdf+xml')
+        pages.append(sorted(str(member).rsplit('/', 1)[1] for member in g.objects(ri, RDFS.member)))
+
+        next_page = g.value(ri, OSLC.nextPage)
+        query = next_page.split('?', 1)[1] if next_page else None
+
+    assert pages == [['X1C2V3B2', 'X1C2V3B3'], ['X1C2V3B1', 'X1C2V3B5'], ['X1C2V3B4']]
+
+    response = pyoslc.get_query_capability('Project-1', {'oslc.orderBy': '+dcterms:modified'})
+    assert response.status_code == 400
+
+
+def test_query_capability_search_terms(pyoslc):
+    """
+    GIVEN the PyOSLC API
+    WHEN requesting the query capability with the oslc.searchTerms parameter
+    THEN
+        only the requirements containing the terms should be members of the response
+        each member should have its oslc:score, higher for the most relevant ones
+    """
+    ri = URIRef('http://localhost/oslc/services/provider/Project-1/resources/requirement')
+
+    response = pyoslc.get_query_capability('Project-1', {'oslc.searchTerms': 'oslc spec'})
+    assert response.status_code == 200
+
+    g = Graph()
+    g.parse(data=response.data, format='application/rdf+xml')
+    scores = dict((member, g.value(member, OSLC.score).toPython()) for member in g.objects(ri, RDFS.member))
+    assert len(scores) == 5
+    assert scores[URIRef(ri + '/X1C2V3B4')] > scores[URIRef(ri + '/X1C2V3B1')] > 0
+
+    response = pyoslc.get_query_capability('Project-1', {'oslc.searchTerms': 'crew', 'oslc.pageSize': '1'})
+    assert response.status_code == 200
+
+    g = Graph()
+    g.parse(data=response.data, format='application/rdf+xml')
+    assert list(g.objects(ri, RDFS.member)) == [URIRef(ri + '/X1C2V3B3')]
+    assert g.value(ri, OSLC.nextPage) is not None
+
+
+def test_query_capability_count(pyoslc):
+    """
+    GIVEN the PyOSLC API
+    WHEN requesting the query capability with an oslc.pageSize of 0
+    THEN
+        the response should have the total count of the query and no members
+    """
+    ri = URIRef('http://localhost/oslc/services/provider/Project-1/resources/requirement')
+
+    for query, count in (({}, 5), ({'oslc.where': 'dcterms:title="OSLC RM Spec 4"'}, 1),
+                         ({'oslc.where': 'oslc_rm:trackedBy>5'}, 0), ({'oslc.searchTerms': 'crew'}, 2)):
+        response = pyoslc.get_query_capability('Project-1', dict(query, **{'oslc.pageSize': '0'}))
+        assert response.status_code == 200
+
+        g = Graph()
+        g.parse(data=response.data, format='application/rdf+xml')
+        assert g.value(ri, OSLC.totalCount) == Literal(count)
+        assert not list(g.objects(ri, RDFS.member))
+
+
+def test_query_capability_cache(pyoslc, monkeypatch):
+    """
+    GIVEN the PyOSLC API
+    WHEN requesting the query capability with the same query several times
+    THEN
+        the results should be answered from the cache with the same ETag
+        the results should be answered as not modified for the ETag of the client
+        the results should be computed again after a change of the requirements
+    """
+    from app.api.adapter.namespaces.business import get_repository
+    from app.api.adapter.namespaces.core import ResourceOperation
+
+    query = {'oslc.where': 'dcterms:title="OSLC RM Spec 4"', 'oslc.select': 'dcterms:description'}
+    response = pyoslc.get_query_capability('Project-1', query)
+    assert response.status_code == 200
+    etag = response.headers.get('etag')
+    assert etag is not None
+
+    with monkeypatch.context() as m:
+        m.setattr(ResourceOperation, 'query', lambda *args: pytest.fail('The results should be cached'))
+
+        cached = pyoslc.get_query_capability('Project-1', {'oslc.select': 'dcterms:description',
+                                                           'oslc.where': 'dcterms:title = "OSLC RM Spec 4"'})
+        assert cached.status_code == 200
+        assert cached.data == response.data
+        assert cached.headers.get('etag') == etag
+        assert cached.headers.getlist('Content-Type') == response.headers.getlist('Content-Type')
+
+        response = pyoslc.get_query_capability('Project-1', query, headers={'If-None-Match': etag})
+        assert response.status_code == 304
+
+    repository = get_repository()
+    requirement = repository.find('X1C2V3B4').to_mapped_object(repository.specification_map)
+    assert repository.update('X1C2V3B4', dict(requirement, Description='Changed'))
+    try:
+        response = pyoslc.get_query_capability('Project-1', query, headers={'If-None-Match': etag})
+        assert response.status_code == 200
+    finally:
+        assert repository.update('X1C2V3B4', requirement)
+
+
 def test_creation_factory(pyoslc):
     """
     GIVEN the PyOSLC API
@@ -198,6 +414,35 @@ def test_creation_factory(pyoslc):
     assert response.status_code == 200
 
 
+def test_creation_factory_several_requirements(pyoslc):
+    """
+    GIVEN the PyOSLC API
+    WHEN requesting the creation factory endpoint with a graph of two requirements
+    THEN the request should be rejected without creating any of them
+    """
+    from app.api.adapter.namespaces.business import get_repository
+
+    payload = """
+        <rdf:RDF
+            xmlns:oslc_rm="http://open-services.net/ns/rm#"
+            xmlns:dcterms="http://purl.org/dc/terms/"
+            xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+            <oslc_rm:Requirement rdf:about="http://localhost/requirement/X1C2V3B8">
+                <dcterms:identifier>X1C2V3B8</dcterms:identifier>
+                <dcterms:subject>Project-1</dcterms:subject>
+            </oslc_rm:Requirement>
+            <oslc_rm:Requirement rdf:about="http://localhost/requirement/X1C2V3B9">
+                <dcterms:identifier>X1C2V3B9</dcterms:identifier>
+                <dcterms:subject>Project-1</dcterms:subject>
+            </oslc_rm:Requirement>
+        </rdf:RDF>
+        """
+
+    response = pyoslc.post_creation_factory('Project-1', payload)
+    assert response.status_code == 400
+    assert get_repository().find('X1C2V3B8') is None
+
+
 def test_query_resource(pyoslc):
     """
     GIVEN the PyOSLC API
@@ -218,6 +218,52 @@ def test_link_target_selector(pyoslc):
     assert b'Find a specific resource through a full-text search.' in response.data
 
 
+def test_selector_search(pyoslc):
+    """
+    GIVEN the PyOSLC API
+    WHEN searching the requirements on the selection dialog
+    THEN only the requirements with the words of the terms are returned
+    """
+    url = 'http://localhost/oslc/services/provider/Project-1/resources/selector?type=specification&terms={}'
+
+    response = pyoslc.get(url.format('spec 4'))
+    assert response.status_code == 200
+    assert response.json['oslc:results'] == [{
+        'oslc:label': 'X1C2V3B4 / OSLC RM Spec 4',
+        'rdf:resource': 'http://localhost/oslc/services/provider/Project-1/resources/requirement/X1C2V3B4'
+    }]
+
+    response = pyoslc.get(url.format(''))
+    assert len(response.json['oslc:results']) >= 5
+    assert 'oslc:nextPage' not in response.json
+
+
+def test_selector_pages(pyoslc):
+    """
+    GIVEN the PyOSLC API
+    WHEN searching the requirements on the selection dialog with a limit
+    THEN the requirements are returned on pages linked by oslc:nextPage
+    """
+    url = 'http://localhost/oslc/services/provider/Project-1/resources/selector?type=specification&terms={}&limit={}'
+
+    labels = list()
+    response = pyoslc.get(url.format('oslc', 2))
+    while True:
+        assert response.status_code == 200
+        assert len(response.json['oslc:results']) <= 2
+        labels.extend(result['oslc:label'].split(' / ')[0] for result in response.json['oslc:results'])
+        if 'oslc:nextPage' not in response.json:
+            break
+        response = pyoslc.get(response.json['oslc:nextPage'])
+
+    response = pyoslc.get(url.format('oslc', 100))
+    assert labels == [result['oslc:label'].split(' / ')[0] for result in response.json['oslc:results']]
+    assert len(labels) > 2
+
+    response = pyoslc.get(url.format('', 0))
+    assert response.status_code == 400
+
+
 def test_show_preview(pyoslc):
     """
     GIVEN the PyOSLC API
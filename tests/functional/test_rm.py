@@ -1,5 +1,11 @@
+import io
 import json
 import logging
+import time
+
+from rdflib import Graph, RDF, URIRef
+
+from pyoslc.vocabularies.rm import OSLC_RM
 
 logger = logging.getLogger(__name__)
 
@@ -194,3 +200,66 @@ def test_delete_not_modified_requirement(client):
                              content_type='application/json')
     assert response.status_code == 304
     assert response.data == b''
+
+
+def test_upload_collection(client):
+    """
+    Testing the method for uploading a csv file with
+    specifications, the file is loaded by a background job
+    and the progress is checked on the status resource
+    """
+    content = (b'Specification_id;Product;Project;Title;Description;Source;Author;Category;'
+               b'Discipline;Revision;Target_Value;Degree_of_fulfillment;Status\n'
+               b'X1C2V3C1;SDK-Dev;Project-1;Uploaded 1;Description 1;Ian Altman;Mario;'
+               b'Customer Requirement;Software Development;0;1;0;Draft\n'
+               b';SDK-Dev;Project-1;Without id;Description;Ian Altman;Mario;'
+               b'Customer Requirement;Software Development;0;1;0;Draft\n')
+
+    response = client.post('oslc/rm/collection',
+                           data={'csv_file': (io.BytesIO(content), 'specifications.csv', 'text/csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202
+
+    location = response.headers.get('Location')
+    for _ in range(50):
+        job = client.get(location).get_json()
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.1)
+
+    assert job['status'] == 'done'
+    assert job['rows'] == 2
+    assert job['imported'] == 1
+    assert len(job['errors']) == 1
+
+    response = client.delete('oslc/rm/requirement/X1C2V3C1',
+                             content_type='application/json')
+    assert response.status_code == 200
+
+
+def test_export_requirements(client):
+    """
+    Testing the export of all the requirements as a
+    stream on the N-Triples, Turtle and JSON-LD formats
+    """
+    response = client.get('oslc/rm/export?format=nt')
+    assert response.status_code == 200
+    assert response.is_streamed
+
+    g = Graph()
+    g.parse(data=response.get_data(as_text=True), format='nt')
+    subject = URIRef('http://localhost/oslc/rm/requirement/X1C2V3B1')
+    assert (subject, RDF.type, OSLC_RM.Requirement) in g
+
+    response = client.get('oslc/rm/export', headers={'Accept': 'text/turtle'})
+    assert response.status_code == 200
+
+    t = Graph()
+    t.parse(data=response.get_data(as_text=True), format='turtle')
+    assert len(t) == len(g)
+
+    response = client.get('oslc/rm/export?format=json-ld')
+    assert response.status_code == 200
+
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == len(set(g.subjects(RDF.type, OSLC_RM.Requirement)))
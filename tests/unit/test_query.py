@@ -0,0 +1,141 @@
+from decimal import Decimal
+
+import pytest
+from rdflib import Literal, URIRef
+from rdflib.namespace import DCTERMS
+
+from app.api.adapter.resources.cache import LRUCache
+from app.api.adapter.resources.query import compile_order, compile_select, compile_where
+from pyoslc.query import QueryError, SortTerm, Term, parse_order_by, parse_prefixes, parse_select, parse_where
+from pyoslc.vocabularies.rm import OSLC_RM
+
+
+def test_parse_where():
+    terms = parse_where('dcterms:title="A \\"quoted\\" title" and oslc_rm:trackedBy>=1.5 and '
+                        'dcterms:subject in ["P1", "P2"] and dcterms:creator=<http://example.com/users/mario>')
+
+    assert terms == [
+        Term(DCTERMS.title, '=', Literal('A "quoted" title')),
+        Term(OSLC_RM.trackedBy, '>=', Literal(Decimal('1.5'))),
+        Term(DCTERMS.subject, 'in', [Literal('P1'), Literal('P2')]),
+        Term(DCTERMS.creator, '=', URIRef('http://example.com/users/mario')),
+    ]
+    assert parse_where('') == []
+
+
+def test_parse_prefixes():
+    prefixes = parse_prefixes('ex=<http://example.com/ns#>,dc=<http://purl.org/dc/terms/>')
+    assert parse_where('ex:value=1 and dc:title="A"', prefixes) == [
+        Term(URIRef('http://example.com/ns#value'), '=', Literal(1)),
+        Term(DCTERMS.title, '=', Literal('A')),
+    ]
+
+
+@pytest.mark.parametrize('where', [
+    'dcterms:title=', 'dcterms:title "A"', 'unknown:title="A"', 'dcterms:title="A" or dcterms:title="B"',
+    'dcterms:title in ["A"', 'dcterms:title="A" and',
+])
+def test_invalid_where(where):
+    with pytest.raises(QueryError):
+        parse_where(where)
+
+
+def test_compile_where():
+    query = compile_where('dcterms:title="Title" and oslc_rm:trackedBy>0 and oslc_rm:decomposedBy in ["Draft","Done"]')
+    assert query is compile_where('dcterms:title="Title" and oslc_rm:trackedBy>0 and '
+                                  'oslc_rm:decomposedBy in ["Draft","Done"]'), 'The query should be cached'
+
+    assert query.filter == {'Title': 'Title'}
+    assert query.columns == {'Title', 'Revision', 'Status'}
+    assert query.predicate({'Title': 'Title', 'Revision': '1', 'Status': 'Done'})
+    assert not query.predicate({'Title': 'Title', 'Revision': '0', 'Status': 'Done'})
+    assert not query.predicate({'Title': 'Title', 'Revision': 'x', 'Status': 'Done'})
+    assert not query.predicate({'Title': 'Title', 'Revision': '2', 'Status': 'Approved'})
+
+    assert compile_where('dcterms:title="A" and dcterms:title="B"').empty
+    assert compile_where('rdf:type=oslc_rm:Requirement').predicate is None
+    assert not compile_where('rdf:type=oslc_rm:Requirement').empty
+    assert compile_where('rdf:type!=oslc_rm:Requirement').empty
+
+    with pytest.raises(QueryError):
+        compile_where('dcterms:modified>"2020"')
+
+
+def test_parse_select():
+    assert parse_select('dcterms:title,oslc_rm:elaboratedBy{dcterms:title,*}') == {
+        DCTERMS.title: None,
+        OSLC_RM.elaboratedBy: {DCTERMS.title: None, '*': None},
+    }
+    assert parse_select('*') == {'*': None}
+    assert parse_select('') == {}
+
+    for select in ('dcterms:title,', 'dcterms:title{', 'unknown:title', 'dcterms:title}'):
+        with pytest.raises(QueryError):
+            parse_select(select)
+
+
+def test_compile_select():
+    selection = compile_select('dcterms:title,oslc_rm:elaboratedBy{dcterms:title},dcterms:modified')
+    assert selection is compile_select('dcterms:title,oslc_rm:elaboratedBy{dcterms:title},dcterms:modified')
+
+    assert selection.properties == {DCTERMS.title, OSLC_RM.elaboratedBy, DCTERMS.modified}
+    assert selection.columns == ['Source', 'Specification_id', 'Title']
+
+    assert compile_select('dcterms:title,*').properties is None
+    assert compile_select('').columns is None
+
+
+def test_parse_order_by():
+    assert parse_order_by('-oslc_rm:trackedBy,+dcterms:title,oslc_rm:elaboratedBy{-dcterms:title}') == [
+        SortTerm(OSLC_RM.trackedBy, '-'),
+        SortTerm(DCTERMS.title, '+'),
+        SortTerm(OSLC_RM.elaboratedBy, [SortTerm(DCTERMS.title, '-')]),
+    ]
+    assert parse_order_by('') == []
+
+    for order_by in ('dcterms:title', '-', '-dcterms:title,', '+dcterms:title{-dcterms:title}'):
+        with pytest.raises(QueryError):
+            parse_order_by(order_by)
+
+
+def test_compile_order():
+    order = compile_order('-oslc_rm:trackedBy,+dcterms:title')
+    assert order is compile_order('-oslc_rm:trackedBy,+dcterms:title')
+    assert order.columns == ['Revision', 'Title', 'Specification_id']
+
+    specifications = [
+        {'Specification_id': 'A', 'Revision': '2', 'Title': 'B'},
+        {'Specification_id': 'B', 'Revision': '10', 'Title': 'A'},
+        {'Specification_id': 'C', 'Revision': '2', 'Title': 'A'},
+        {'Specification_id': 'D', 'Revision': '', 'Title': 'A'},
+    ]
+    specifications.sort(key=order.key)
+    assert [s['Specification_id'] for s in specifications] == ['D', 'B', 'C', 'A']
+
+    cursor = order.cursor(specifications[1])
+    assert order.after(cursor) == order.key(specifications[1])
+    assert [s['Specification_id'] for s in specifications if order.key(s) > order.after(cursor)] == ['C', 'A']
+
+    assert compile_order('') is None
+    for order_by in ('+dcterms:modified', 'oslc_rm:elaboratedBy{+dcterms:title}'):
+        with pytest.raises(QueryError):
+            compile_order(order_by)
+    with pytest.raises(QueryError):
+        order.after('["2"]')
+
+
+def test_cache_size():
+    cache = LRUCache(3, maxbytes=10)
+    cache.put('a', b'12345')
+    cache.put('b', b'1234')
+    cache.put('c', b'123')
+    assert cache.get('a') is None, 'The values should be removed when they exceed the size'
+    assert (len(cache), cache.total) == (2, 7)
+
+    cache.put('d', b'12345678901')
+    assert cache.get('d') is None, 'A value larger than the cache should not be kept'
+    assert cache.get('b') == b'1234'
+
+    cache.put('b', b'12345678')
+    assert cache.get('c') is None
+    assert (len(cache), cache.total) == (1, 8)
@@ -0,0 +1,579 @@
+import errno
+import os
+import shutil
+import threading
+
+import pytest
+from flask import Flask
+
+from app.api.adapter.namespaces.rm import csv_requirement_repository
+from app.api.adapter.namespaces.rm.csv_requirement_repository import CsvRequirementRepository, \
+    CompactCsvRequirementRepository, MappedCsvRequirementRepository
+from app.api.adapter.namespaces.rm.sharded_requirement_repository import ShardedCsvRequirementRepository
+from app.api.adapter.namespaces.rm.sql_requirement_repository import SqlRequirementRepository
+from app.api.adapter.resources.columns import ColumnTable
+from app.api.adapter.resources.query import compile_order, compile_where, specification_of
+from pyoslc_oauth.database import db
+
+base_dir = os.path.abspath(os.path.dirname(__file__))
+
+
+@pytest.fixture
+def repository(tmpdir):
+    """
+    Creating a repository over a copy of the synthetic
+    data for not modifying the examples file
+    """
+    path = str(tmpdir.join('specifications.csv'))
+    shutil.copy(os.path.join(base_dir, '..', '..', 'examples', 'specifications.csv'), path)
+    return CsvRequirementRepository('specifications', path)
+
+
+@pytest.fixture
+def sql_repository(repository):
+    """
+    Creating a repository on an in-memory database
+    loaded with the synthetic data
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        sql_repository = SqlRequirementRepository('specifications')
+        for row in repository.load().values():
+            sql_repository.create(row)
+        yield sql_repository
+
+
+@pytest.fixture(params=['csv', 'compact', 'mapped', 'sharded', 'sql'])
+def store(request, repository):
+    """
+    Creating each kind of repository over the
+    copy of the synthetic data
+    """
+    if request.param == 'sql':
+        return request.getfixturevalue('sql_repository')
+
+    repository_classes = {
+        'csv': CsvRequirementRepository,
+        'compact': CompactCsvRequirementRepository,
+        'mapped': MappedCsvRequirementRepository,
+        'sharded': ShardedCsvRequirementRepository,
+    }
+    return repository_classes[request.param]('specifications', repository.csv_file_path)
+
+
+def test_find_requirement(repository):
+    requirement = repository.find('X1C2V3B1')
+
+    assert requirement is not None
+    assert requirement.identifier == 'X1C2V3B1'
+    assert repository.find('X1C2V3B8') is None
+
+
+def test_reload_only_when_changed(repository):
+    rows = repository.load()
+    assert len(rows) == 5
+    assert repository.load() is rows, 'The file should not be parsed again'
+
+    with open(repository.csv_file_path, 'a') as f:
+        f.write('X1C2V3B9;SDK-Dev;Project-1;Title 9;Description 9;Ian Altman;Mario;'
+                'Customer Requirement;Software Development;0;1;0;Draft\n')
+
+    assert repository.load() is not rows, 'The file should be parsed after a change'
+    assert repository.find('X1C2V3B9').title == 'Title 9'
+
+
+def test_writes_on_journal(repository):
+    with open(repository.csv_file_path) as f:
+        content = f.read()
+
+    specification = dict(Specification_id='X1C2V3B7', Title='Title 7', Project='Project-1')
+    assert repository.create(specification)
+    assert not repository.create(specification), 'The requirement already exists'
+    assert repository.update('X1C2V3B1', dict(Title='Updated 1', Project='Project-1'))
+    assert repository.delete('X1C2V3B2')
+
+    with open(repository.csv_file_path) as f:
+        assert f.read() == content, 'The csv file should not be rewritten'
+
+    other = CsvRequirementRepository('specifications', repository.csv_file_path)
+    assert other.find('X1C2V3B7').title == 'Title 7'
+    assert other.find('X1C2V3B1').title == 'Updated 1'
+    assert other.find('X1C2V3B2') is None
+
+
+def test_group_commit(repository):
+    appends = list()
+    append = repository.journal.append
+
+    def counting_append(records):
+        appends.append(len(records))
+        return append(records)
+
+    repository.journal.append = counting_append
+    repository.commit_delay = 0.05
+
+    threads = [threading.Thread(target=repository.create,
+                                args=(dict(Specification_id='X2C2V3B{}'.format(i), Title='Title {}'.format(i)),))
+               for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(appends) == 20
+    assert len(appends) < 20, 'The concurrent writes should share the appends'
+
+    other = CsvRequirementRepository('specifications', repository.csv_file_path)
+    assert other.count() == 25
+    assert other.find('X2C2V3B7').title == 'Title 7'
+
+
+def test_compaction(repository):
+    repository.create(dict(Specification_id='X1C2V3B7', Title='Title 7', Project='Project-1'))
+    repository.delete('X1C2V3B1')
+    repository.compact()
+
+    assert not os.path.exists(repository.journal.path)
+
+    other = CsvRequirementRepository('specifications', repository.csv_file_path)
+    assert list(other.load().keys()) == ['X1C2V3B2', 'X1C2V3B3', 'X1C2V3B4', 'X1C2V3B5', 'X1C2V3B7']
+    assert repository.find('X1C2V3B7').title == 'Title 7'
+
+
+def test_compaction_with_other_writers(repository):
+    other = CsvRequirementRepository('specifications', repository.csv_file_path)
+    assert repository.update('X1C2V3B1', dict(Title='Updated 1', Project='Project-1'))
+
+    discard = repository.journal.discard
+    created = list()
+    writers = list()
+
+    def discard_while_writing(offset):
+        specification = dict(Specification_id='X1C2V3B7', Title='Title 7', Project='Project-1')
+        writers.append(threading.Thread(target=lambda: created.append(other.create(specification))))
+        writers[0].start()
+        writers[0].join(0.5)
+        assert not created, 'The append should wait for the compaction'
+        discard(offset)
+
+    repository.journal.discard = discard_while_writing
+    repository.compact()
+    writers[0].join()
+
+    assert created == [True]
+    fresh = CsvRequirementRepository('specifications', repository.csv_file_path)
+    assert fresh.find('X1C2V3B7').title == 'Title 7'
+    assert fresh.find('X1C2V3B1').title == 'Updated 1'
+
+
+def test_sql_repository(sql_repository):
+    assert sql_repository.find('X1C2V3B1').identifier == 'X1C2V3B1'
+    assert sql_repository.find('X1C2V3B8') is None
+    assert not sql_repository.create(dict(Specification_id='X1C2V3B1'))
+
+    assert sql_repository.update('X1C2V3B1', dict(Title='Updated 1', Project='Project-2', Status='Approved'))
+    assert sql_repository.find('X1C2V3B1').title == 'Updated 1'
+
+    requirements = list(sql_repository.iter(filter={'Project': 'Project-2', 'Status': 'Approved'}))
+    assert [r.identifier for r in requirements] == ['X1C2V3B1']
+
+    assert sql_repository.delete('X1C2V3B1')
+    assert not sql_repository.delete('X1C2V3B1')
+    assert len(list(sql_repository.iter())) == 4
+
+
+def test_mapped_repository(repository):
+    with open(repository.csv_file_path, 'a') as f:
+        f.write('X1C2V3B9;SDK-Dev;Project-1;Title 9;"Description\non two lines";Ian Altman;Mario;'
+                'Customer Requirement;Software Development;0;1;0;Draft\n')
+
+    mapped = MappedCsvRequirementRepository('specifications', repository.csv_file_path)
+    assert mapped.find('X1C2V3B9').description == 'Description\non two lines'
+    assert mapped.find('X1C2V3B1').identifier == 'X1C2V3B1'
+    assert not mapped.rows, 'The rows of the file should not be kept in memory'
+    assert os.path.exists(mapped.index_path)
+
+    assert mapped.delete('X1C2V3B1')
+    assert mapped.find('X1C2V3B1') is None
+    assert mapped.update('X1C2V3B2', dict(Title='Updated 2'))
+    mapped.compact()
+
+    other = MappedCsvRequirementRepository('specifications', repository.csv_file_path)
+    assert [r.identifier for r in other.iter()] == ['X1C2V3B2', 'X1C2V3B3', 'X1C2V3B4', 'X1C2V3B5', 'X1C2V3B9']
+    assert other.find('X1C2V3B2').title == 'Updated 2'
+
+    stored = MappedCsvRequirementRepository('specifications', repository.csv_file_path)
+    stored._build_index = lambda signature: pytest.fail('The index of the file should be read')
+    stored._build_indexes = lambda rows: pytest.fail('The indexes should be read with the index of the file')
+    assert stored.select({'Project': 'Project-1'}) == {'X1C2V3B3', 'X1C2V3B4', 'X1C2V3B5', 'X1C2V3B9'}
+    assert [r.identifier for r in stored.search('updated')] == ['X1C2V3B2']
+    assert sorted(r.identifier for r, _ in stored.rank('awesome')) == ['X1C2V3B3', 'X1C2V3B4', 'X1C2V3B5']
+    assert stored.update('X1C2V3B3', dict(Title='Updated 3', Project='Project-2'))
+    assert stored.select({'Project': 'Project-2'}) == {'X1C2V3B3'}
+    assert stored.count(terms='updated') == 2
+
+
+def test_mapped_repository_index_errors(repository, monkeypatch):
+    mapped = MappedCsvRequirementRepository('specifications', repository.csv_file_path)
+    mapped.load()
+    with open(mapped.index_path, 'rb') as f:
+        data = f.read()
+
+    for damaged in (data[:len(data) // 2], b'not an index', b'cos\nnonexistent_attribute\n.'):
+        with open(mapped.index_path, 'wb') as f:
+            f.write(damaged)
+        other = MappedCsvRequirementRepository('specifications', repository.csv_file_path)
+        assert other.find('X1C2V3B5').identifier == 'X1C2V3B5', 'A damaged index should be built again'
+
+    def unwritable(*args, **kwargs):
+        raise OSError(errno.EACCES, 'Permission denied')
+
+    os.remove(mapped.index_path)
+    monkeypatch.setattr(csv_requirement_repository, 'NamedTemporaryFile', unwritable)
+    other = MappedCsvRequirementRepository('specifications', repository.csv_file_path)
+    assert other.find('X1C2V3B5').identifier == 'X1C2V3B5', 'The index should be kept in memory'
+    assert not os.path.exists(mapped.index_path)
+
+
+def test_compact_repository(repository, monkeypatch):
+    compact = CompactCsvRequirementRepository('specifications', repository.csv_file_path)
+    rows = compact.load()
+    assert list(rows.keys()) == list(repository.load().keys())
+    assert rows['X1C2V3B1'] == repository.load()['X1C2V3B1']
+    assert rows.cardinality()['Project'] == 1
+    assert rows['X1C2V3B1']['Project'] is rows['X1C2V3B2']['Project'], 'The values should be shared'
+
+    built = list()
+    monkeypatch.setattr(ColumnTable, '__getitem__', lambda self, key: built.append(key) or {'Specification_id': key})
+    assert next(compact.iter_rows())['Specification_id'] == 'X1C2V3B1'
+    assert built == ['X1C2V3B1'], 'The dicts of the rows should be built one by one'
+    monkeypatch.undo()
+
+    assert compact.update('X1C2V3B1', dict(Title='Updated 1', Project='Project-2'))
+    assert compact.delete('X1C2V3B2')
+    assert compact.create(dict(Specification_id='X1C2V3B7', Title='Title 7', Project='Project-1'))
+    assert compact.count() == 5
+    assert compact.count({'Project': 'Project-2'}) == 1
+    compact.compact()
+
+    other = CompactCsvRequirementRepository('specifications', repository.csv_file_path)
+    assert [r.identifier for r in other.iter()] == ['X1C2V3B1', 'X1C2V3B3', 'X1C2V3B4', 'X1C2V3B5', 'X1C2V3B7']
+    assert other.find('X1C2V3B1').title == 'Updated 1'
+    assert compact.find('X1C2V3B7').title == 'Title 7'
+
+    def concurrent(*args, **kwargs):
+        # A change made while the new file is being written
+        compact.delete('X1C2V3B3')
+        return named_temporary_file(*args, **kwargs)
+
+    named_temporary_file = csv_requirement_repository.NamedTemporaryFile
+    assert compact.update('X1C2V3B4', dict(Title='Updated 4'))
+    monkeypatch.setattr(csv_requirement_repository, 'NamedTemporaryFile', concurrent)
+    compact.compact()
+    monkeypatch.undo()
+
+    with open(repository.csv_file_path) as f:
+        assert 'X1C2V3B3' in f.read(), 'The compaction should write the rows at the offset of the journal'
+    other = CompactCsvRequirementRepository('specifications', repository.csv_file_path)
+    assert other.find('X1C2V3B3') is None
+    assert other.find('X1C2V3B4').title == 'Updated 4'
+
+
+def test_batch_operations(repository, sql_repository):
+    for store in (repository, sql_repository):
+        requirements = store.find_many(['X1C2V3B3', 'X1C2V3B8', 'X1C2V3B1'])
+        assert [r.identifier for r in requirements] == ['X1C2V3B3', 'X1C2V3B1']
+
+        assert store.count() == 5
+        assert store.count({'Project': 'Project-1'}) == 5
+        assert store.count({'Project': 'Project-2'}) == 0
+
+        requirement = next(store.iter(fields=['Title']))
+        assert requirement.identifier == 'X1C2V3B1'
+        assert requirement.title == 'The ACRV shall provide medical life-support accommodations for one crew member'
+        assert not requirement.description, 'Only the selected fields should be loaded'
+
+        assert store.bulk_upsert([dict(Specification_id='X1C2V3B1', Title='Updated 1'),
+                                  dict(Specification_id='X1C2V3B7', Title='Title 7')]) == 2
+        assert store.find('X1C2V3B1').title == 'Updated 1'
+
+        assert store.bulk_delete(['X1C2V3B1', 'X1C2V3B7', 'X1C2V3B8']) == 2
+        assert store.count() == 4
+
+
+@pytest.mark.parametrize('repository_class', [CsvRequirementRepository, CompactCsvRequirementRepository,
+                                              MappedCsvRequirementRepository])
+def test_secondary_indexes(repository, repository_class):
+    store = repository_class('specifications', repository.csv_file_path)
+    assert store.indexes()['Project'] == {'Project-1': {'X1C2V3B1', 'X1C2V3B2', 'X1C2V3B3', 'X1C2V3B4', 'X1C2V3B5'}}
+
+    assert store.update('X1C2V3B3', dict(Title='Updated 3', Project='Project-2', Status='Approved'))
+    assert store.create(dict(Specification_id='X1C2V3B0', Title='Title 0', Project='Project-2'))
+    assert store.delete('X1C2V3B1')
+
+    assert store.select({'Project': 'Project-2'}) == {'X1C2V3B0', 'X1C2V3B3'}
+    assert store.select({'Project': 'Project-2', 'Status': 'Approved'}) == {'X1C2V3B3'}
+    assert store.select({'Title': 'Title 0'}) is None
+    assert 'X1C2V3B1' not in store.select({'Project': 'Project-1'})
+
+    requirements = store.iter({'Project': 'Project-2'}, fields=['Title'])
+    assert [(r.identifier, r.title) for r in requirements] == [('X1C2V3B0', 'Title 0'), ('X1C2V3B3', 'Updated 3')]
+    assert [r.identifier for r in store.iter({'Project': 'Project-2', 'Title': 'Title 0'})] == ['X1C2V3B0']
+    assert store.count({'Project': 'Project-1'}) == 3
+    assert store.count({'Project': 'Project-3'}) == 0
+
+    store.get_row = lambda requirement_id: pytest.fail('The rows should be read without loading for each id')
+    assert [r.identifier for r in store.iter({'Project': 'Project-2'})] == ['X1C2V3B0', 'X1C2V3B3']
+    assert [r.identifier for r in store.search('title 0')] == ['X1C2V3B0']
+    assert [r.identifier for r in store.find_many(['X1C2V3B3', 'X1C2V3B1', 'X1C2V3B0'])] == ['X1C2V3B3', 'X1C2V3B0']
+    assert store.bulk_delete(['X1C2V3B0', 'X1C2V3B1']) == 1
+
+
+def test_text_search(store):
+    assert [r.identifier for r in store.search('spec 4')] == ['X1C2V3B4']
+    assert [r.identifier for r in store.search('Crew')] == ['X1C2V3B1', 'X1C2V3B3']
+    assert [r.identifier for r in store.search('Crew', after='X1C2V3B1')] == ['X1C2V3B3']
+    assert [r.identifier for r in store.search('x1c2v3b2')] == ['X1C2V3B2']
+    assert [r.identifier for r in store.search('awesome 5')] == ['X1C2V3B5']
+    assert not list(store.search('specifications')), 'The words should begin with the terms'
+
+    assert store.update('X1C2V3B4', dict(Title='Flight controls', Description='Manual override'))
+    assert not list(store.search('spec 4'))
+    assert [r.identifier for r in store.search('overr fli')] == ['X1C2V3B4']
+    assert store.delete('X1C2V3B4')
+    assert not list(store.search('flight'))
+
+
+def test_sharded_repository(repository):
+    assert repository.update('X1C2V3B2', dict(Title='Title 2', Project='Project-2'))
+
+    sharded = ShardedCsvRequirementRepository('specifications', repository.csv_file_path)
+    assert sorted(sharded.shards()) == ['Project-1', 'Project-2']
+    assert os.path.exists(sharded.shard_path('Project-2'))
+
+    assert [r.identifier for r in sharded.iter({'Project': 'Project-2'})] == ['X1C2V3B2']
+    assert sharded.count({'Project': 'Project-1'}) == 4
+    assert sharded.count({'Project': 'Project-3'}) == 0
+    assert sharded.find('X1C2V3B2').title == 'Title 2'
+
+    assert sharded.create(dict(Specification_id='X1C2V3B7', Title='Title 7', Project='Project 3/A'))
+    assert not sharded.create(dict(Specification_id='X1C2V3B1', Project='Project-2'))
+    assert sharded.update('X1C2V3B1', dict(Title='Updated 1', Project='Project-2'))
+    assert sharded.bulk_upsert([dict(Specification_id='X1C2V3B3', Title='Updated 3', Project='Project 3/A')]) == 1
+    assert sharded.delete('X1C2V3B4')
+
+    other = ShardedCsvRequirementRepository('specifications', repository.csv_file_path)
+    assert sorted(other.shards()) == ['Project 3/A', 'Project-1', 'Project-2']
+    assert [r.identifier for r in other.iter({'Project': 'Project-1'})] == ['X1C2V3B5']
+    assert [r.identifier for r in other.iter({'Project': 'Project-2'})] == ['X1C2V3B2', 'X1C2V3B1']
+    assert [r.identifier for r in other.iter({'Project': 'Project 3/A'})] == ['X1C2V3B7', 'X1C2V3B3']
+    assert [r.identifier for r in other.search('title')] == ['X1C2V3B2', 'X1C2V3B7']
+    assert other.count() == 5
+
+
+def test_keyset_pages(store):
+    assert store.create(dict(Specification_id='X1C2V3B0', Title='Title 0', Project='Project-2'))
+    assert store.delete('X1C2V3B3')
+
+    assert [r.identifier for r in store.page(limit=2)] == ['X1C2V3B0', 'X1C2V3B1']
+    assert [r.identifier for r in store.page(after='X1C2V3B1', limit=2)] == ['X1C2V3B2', 'X1C2V3B4']
+    assert [r.identifier for r in store.page(after='X1C2V3B4', limit=2)] == ['X1C2V3B5']
+    assert [r.identifier for r in store.page({'Project': 'Project-1'}, limit=1)] == ['X1C2V3B1']
+    assert [r.identifier for r in store.page({'Project': 'Project-2'})] == ['X1C2V3B0']
+
+    requirements = store.page(after='X1C2V3B1', fields=['Title'], predicate=lambda s: s['Title'].startswith('OSLC'))
+    assert [(r.identifier, r.title) for r in requirements] == [('X1C2V3B4', 'OSLC RM Spec 4'),
+                                                               ('X1C2V3B5', 'OSLC RM Spec 5')]
+
+
+def test_ordered_pages(store):
+    by_status = compile_order('+oslc_rm:decomposedBy,-dcterms:identifier')
+    by_title = compile_order('-dcterms:title')
+    by_identifier = compile_order('-dcterms:identifier')
+    assert store.update('X1C2V3B2', dict(Title='Title 2', Project='Project-2', Status='Approved'))
+    assert store.update('X1C2V3B4', dict(Title='Title 4', Project='Project-1', Status='Approved'))
+
+    requirements = store.page(limit=3, order=by_status)
+    assert [r.identifier for r in requirements] == ['X1C2V3B4', 'X1C2V3B2', 'X1C2V3B5']
+    after = by_status.after(by_status.cursor(specification_of(requirements[-1])))
+    assert [r.identifier for r in store.page(after=after, limit=3, order=by_status)] == ['X1C2V3B3', 'X1C2V3B1']
+    assert [r.identifier for r in store.page(limit=None, order=by_status)] == ['X1C2V3B4', 'X1C2V3B2', 'X1C2V3B5',
+                                                                               'X1C2V3B3', 'X1C2V3B1']
+
+    requirements = store.page({'Project': 'Project-1'}, limit=None, order=by_title)
+    assert [r.identifier for r in requirements] == ['X1C2V3B4', 'X1C2V3B3', 'X1C2V3B1', 'X1C2V3B5']
+
+    after = by_identifier.after('["X1C2V3B4"]')
+    assert [r.identifier for r in store.page(after=after, limit=2, order=by_identifier)] == ['X1C2V3B3', 'X1C2V3B2']
+
+
+def test_ranked_search(store):
+    assert store.update('X1C2V3B2', dict(Title='Crew crew crew', Description='Crew', Project='Project-2'))
+
+    ranking = store.rank('crew')
+    assert [r.identifier for r, _ in ranking] == ['X1C2V3B2', 'X1C2V3B3', 'X1C2V3B1']
+    assert [round(score, 6) for _, score in ranking] == [1.673335, 1.242095, 0.730155], \
+        'The scores should not depend on the store'
+
+    assert [r.identifier for r, _ in store.rank('crew', {'Project': 'Project-1'}, limit=1)] == ['X1C2V3B3']
+    assert not store.rank('unknown')
+
+    order = compile_order('-dcterms:identifier')
+    ranking = store.rank('oslc spec', limit=2, order=order)
+    assert [r.identifier for r, _ in ranking] == ['X1C2V3B5', 'X1C2V3B4']
+    after = order.key(specification_of(ranking[-1][0]), ranking[-1][1])
+    assert [r.identifier for r, _ in store.rank('oslc spec', after=after, order=order)] == ['X1C2V3B3', 'X1C2V3B1']
+
+
+def test_count_without_requirements(store, monkeypatch):
+    def is_spec(specification):
+        return specification['Title'].startswith('OSLC')
+
+    assert store.update('X1C2V3B2', dict(Title='Crew', Project='Project-2', Status='Approved'))
+
+    monkeypatch.setattr(CsvRequirementRepository, 'to_requirement', lambda *args: pytest.fail('Not counted'))
+    monkeypatch.setattr(SqlRequirementRepository, 'to_requirement', lambda *args: pytest.fail('Not counted'))
+    assert store.count() == 5
+    assert store.count({'Project': 'Project-1'}) == 4
+    assert store.count({'Project': 'Project-1', 'Title': 'OSLC RM Spec 4'}) == 1
+    assert store.count({'Project': 'Project-1'}, is_spec) == 2
+    assert store.count(terms='crew') == 3
+    assert store.count({'Project': 'Project-1'}, terms='crew') == 2
+
+
+def test_sql_text_index(sql_repository):
+    assert sql_repository.count(terms='crew') == 2
+    index = sql_repository.text_index()
+    assert sql_repository.text_index() is index, 'The text index should be kept for the version'
+    assert [r.identifier for r, _ in sql_repository.rank('crew')] == ['X1C2V3B3', 'X1C2V3B1']
+
+    assert sql_repository.update('X1C2V3B2', dict(Title='Crew', Project='Project-2'))
+    assert sql_repository.text_index() is not index, 'The text index should be built again after a write'
+    assert sql_repository.count(terms='crew') == 3
+    assert sql_repository.count({'Project': 'Project-2'}, terms='crew') == 1
+
+
+def test_current_version(repository, sql_repository):
+    sharded = ShardedCsvRequirementRepository('specifications', repository.csv_file_path)
+    for store in (repository, sql_repository, sharded):
+        version = store.current_version()
+        assert store.current_version() == version
+        assert store.update('X1C2V3B2', dict(Title='Title 2', Project='Project-1'))
+        assert store.current_version() != version
+
+    other = CsvRequirementRepository('specifications', repository.csv_file_path)
+    version = repository.current_version()
+    assert other.create(dict(Specification_id='X1C2V3B7', Title='Title 7', Project='Project-1'))
+    assert repository.current_version() != version, 'The writes of other processes should change the version'
+
+    versions = [sql_repository.current_version()]
+    assert sql_repository.create(dict(Specification_id='X1C2V3B7', Title='Title 7', Project='Project-1'))
+    versions.append(sql_repository.current_version())
+    assert sql_repository.bulk_upsert([dict(Specification_id='X1C2V3B7', Title='Title 7', Project='Project-2')]) == 1
+    versions.append(sql_repository.current_version())
+    assert sql_repository.delete('X1C2V3B7')
+    versions.append(sql_repository.current_version())
+    assert sql_repository.bulk_delete(['X1C2V3B1', 'X1C2V3B7']) == 1
+    versions.append(sql_repository.current_version())
+    assert len(set(versions)) == len(versions), 'Each write should change the version'
+    assert not sql_repository.delete('X1C2V3B7')
+    assert sql_repository.current_version() == versions[-1]
+
+
+def test_sql_where(repository, sql_repository):
+    query = compile_where('dcterms:title >= "T" and oslc_rm:decomposedBy in ["Approved", "Rejected"]')
+    _, predicate = sql_repository.where(query.filter, query.predicate)
+    assert predicate is None, 'The string terms should be evaluated by the database'
+
+    numbers = compile_where('dcterms:title >= "OSLC" and dcterms:description > 3')
+    _, predicate = sql_repository.where(numbers.filter, numbers.predicate)
+    assert [term[:2] for term in predicate.terms] == [('Description', '>')]
+
+    by_title = compile_order('-dcterms:title')
+    for store in (repository, sql_repository):
+        assert store.update('X1C2V3B2', dict(Title='Title 2', Project='Project-2', Status='Approved'))
+        assert store.update('X1C2V3B4', dict(Title='Title 4', Project='Project-1', Status='Rejected'))
+
+    expected = [r.identifier for r in repository.page(limit=None, predicate=query.predicate, order=by_title)]
+    assert expected == ['X1C2V3B4', 'X1C2V3B2']
+    assert [r.identifier for r in sql_repository.page(limit=None, predicate=query.predicate,
+                                                      order=by_title)] == expected
+    assert [r.identifier for r in sql_repository.page(limit=1, predicate=query.predicate)] == ['X1C2V3B2']
+    assert sql_repository.count(predicate=query.predicate) == repository.count(predicate=query.predicate) == 2
+    assert sql_repository.count(predicate=numbers.predicate) == repository.count(predicate=numbers.predicate)
+
+
+def test_sql_ordered_pages(repository, sql_repository):
+    revisions = {'X1C2V3B1': '10', 'X1C2V3B2': ' 9.5', 'X1C2V3B3': 'draft', 'X1C2V3B4': '1e1', 'X1C2V3B5': ''}
+    for store in (repository, sql_repository):
+        for requirement_id, revision in revisions.items():
+            assert store.update(requirement_id, dict(Title='Title', Revision=revision))
+
+    for order in (compile_order('+oslc_rm:trackedBy'), compile_order('-oslc_rm:trackedBy,-dcterms:title')):
+        expected = [r.identifier for r in repository.page(limit=None, order=order)]
+        assert [r.identifier for r in sql_repository.page(limit=None, order=order)] == expected
+
+        found, after = list(), None
+        while True:
+            requirements = sql_repository.page(after=after, limit=2, order=order, fields=order.columns)
+            if not requirements:
+                break
+            found.extend(r.identifier for r in requirements)
+            after = order.key(specification_of(requirements[-1]))
+        assert found == expected, 'The pages should continue after the key of the cursor'
+
+
+@pytest.mark.parametrize('repository_class', [CsvRequirementRepository, CompactCsvRequirementRepository])
+def test_snapshot_cache(repository, repository_class):
+    store = repository_class('specifications', repository.csv_file_path)
+    assert store.create(dict(Specification_id='X1C2V3B7', Title='Title 7', Project='Project-1'))
+    assert os.path.exists(store.snapshot_path)
+
+    other = repository_class('specifications', repository.csv_file_path)
+    other._read_snapshot = lambda signature: pytest.fail('The csv file should not be parsed')
+    assert other.find('X1C2V3B1').identifier == 'X1C2V3B1'
+    assert other.find('X1C2V3B7').title == 'Title 7', 'The journal should be applied on the snapshot'
+    assert other.select({'Project': 'Project-1'}) == set(other.load().keys())
+    assert [r.identifier for r in other.search('title 7')] == ['X1C2V3B7']
+
+    with open(repository.csv_file_path, 'a') as f:
+        f.write('X1C2V3B9;SDK-Dev;Project-1;Title 9;Description 9;Ian Altman;Mario;'
+                'Customer Requirement;Software Development;0;1;0;Draft\n')
+
+    changed = repository_class('specifications', repository.csv_file_path)
+    assert changed.find('X1C2V3B9').title == 'Title 9', 'The snapshot should not be used after a change'
+
+
+@pytest.mark.parametrize('repository_class', [CsvRequirementRepository, CompactCsvRequirementRepository])
+def test_snapshot_cache_errors(repository, repository_class, monkeypatch):
+    store = repository_class('specifications', repository.csv_file_path)
+    store.load()
+    assert os.path.exists(store.snapshot_path)
+
+    with open(store.snapshot_path, 'wb') as f:
+        f.write(b'not a snapshot')
+    assert repository_class('specifications', repository.csv_file_path).find('X1C2V3B1') is not None
+
+    with open(store.snapshot_path, 'wb') as f:
+        f.write(b'cos\nnonexistent_attribute\n.')
+    assert repository_class('specifications', repository.csv_file_path).find('X1C2V3B1') is not None
+
+    def unwritable(*args, **kwargs):
+        raise OSError(errno.EACCES, 'Permission denied')
+
+    os.remove(store.snapshot_path)
+    directory = os.path.dirname(store.snapshot_path)
+    os.chmod(directory, 0o555)
+    if os.geteuid() == 0:
+        # The permissions are not checked for root
+        monkeypatch.setattr(csv_requirement_repository, 'NamedTemporaryFile', unwritable)
+    try:
+        other = repository_class('specifications', repository.csv_file_path)
+        assert other.find('X1C2V3B1') is not None, 'The rows should be loaded without the snapshot'
+        assert not os.path.exists(store.snapshot_path)
+    finally:
+        os.chmod(directory, 0o755)
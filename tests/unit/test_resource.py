@@ -1,7 +1,55 @@
+from rdflib import RDF, Graph, Literal, URIRef
+from rdflib.namespace import DCTERMS
+
+from app.api.adapter.mappings.specification import specification_map
+from pyoslc.resources.domains.rm import Requirement
+from pyoslc.resources.mapping import compile_mapping
 from pyoslc.resources.models import ServiceProvider
+from pyoslc.vocabularies.rm import OSLC_RM
 
 
 def test_service_provider():
     sp = ServiceProvider()
 
     assert sp is not None
+
+
+def test_compiled_mapping():
+    mapping = compile_mapping(specification_map, Requirement)
+    assert compile_mapping(specification_map, Requirement) is mapping
+    assert mapping.keys['Title'] == ('Title', '_BaseResource__title', DCTERMS.title, False)
+    assert mapping.keys['Source'].multiple
+    assert 'PUID' not in mapping.keys, 'The attributes the class does not have should be left out'
+
+
+def test_requirement_mapping():
+    requirement = Requirement()
+    requirement.update({'Specification_id': 'X1C2V3B1', 'Title': 'Title 1', 'Source': 'Ian'}, specification_map)
+    requirement.from_json({'project': 'Project-1', 'unknown': 'value'}, specification_map)
+    assert requirement.to_mapped_object(specification_map) == {
+        'Specification_id': 'X1C2V3B1', 'Title': 'Title 1', 'Source': 'Ian', 'Project': 'Project-1'}
+
+    graph = requirement.to_rdf(Graph(), 'http://localhost/requirement', specification_map)
+    about = URIRef('http://localhost/requirement/X1C2V3B1')
+    assert graph.value(about, DCTERMS.title) == Literal('Title 1')
+    assert graph.value(about, OSLC_RM.elaboratedBy) == Literal('Ian')
+
+    graph = requirement.to_rdf(Graph(), 'http://localhost/requirement', specification_map, {DCTERMS.title})
+    assert set(graph.predicates(about)) == {RDF.type, DCTERMS.title}
+
+
+def test_requirements_from_rdf():
+    graph = Graph()
+    for identifier, title in (('X1C2V3B1', 'Title 1'), ('X1C2V3B2', 'Title 2')):
+        Requirement(identifier=identifier, title=title, elaborated_by={'Ian'}).to_rdf(
+            graph, 'http://localhost/requirement', specification_map)
+
+    requirements = Requirement.list_from_rdf(graph, specification_map)
+    assert [(r.about, r.identifier, r.title) for r in requirements] == [
+        ('http://localhost/requirement/X1C2V3B1', 'X1C2V3B1', 'Title 1'),
+        ('http://localhost/requirement/X1C2V3B2', 'X1C2V3B2', 'Title 2')]
+    assert requirements[0].to_mapped_object(specification_map)['Source'] == 'Ian'
+
+    requirement = Requirement()
+    requirement.from_rdf(graph, specification_map)
+    assert requirement.identifier == 'X1C2V3B1'
@@ -0,0 +1,80 @@
+import os
+import shutil
+import threading
+
+import pytest
+
+from app.api.adapter.namespaces.rm.csv_requirement_repository import CsvRequirementRepository
+from app.api.adapter.resources.watcher import InotifyWatcher, PollingWatcher, create_watcher
+
+base_dir = os.path.abspath(os.path.dirname(__file__))
+
+
+@pytest.fixture(params=['inotify', 'poll'])
+def watcher(request):
+    watcher = create_watcher(request.param, interval=0.05)
+    yield watcher
+    watcher.stop()
+
+
+def test_create_watcher():
+    for kind, watcher_class in (('inotify', InotifyWatcher), ('poll', PollingWatcher)):
+        watcher = create_watcher(kind)
+        assert isinstance(watcher, watcher_class)
+        watcher.stop()
+
+    assert create_watcher('') is None
+
+
+def test_notify_changes(watcher, tmpdir):
+    path = str(tmpdir.join('watched.csv'))
+    other = str(tmpdir.join('other.csv'))
+    with open(path, 'w') as f:
+        f.write('a')
+
+    changed = threading.Event()
+    paths = list()
+    watcher.add(path, lambda p: (paths.append(p), changed.set()))
+
+    with open(other, 'w') as f:
+        f.write('b')
+    with open(path, 'a') as f:
+        f.write('bc')
+
+    assert changed.wait(5)
+    assert set(paths) == {path}
+
+
+def test_repository_reload_on_notification(watcher, tmpdir):
+    path = str(tmpdir.join('specifications.csv'))
+    shutil.copy(os.path.join(base_dir, '..', '..', 'examples', 'specifications.csv'), path)
+
+    store = CsvRequirementRepository('specifications', path)
+    store.watch(watcher)
+    rows = store.load()
+    version = store.version
+
+    changed = threading.Event()
+    watcher.add(path, lambda p: changed.set())
+
+    with open(path, 'a') as f:
+        f.write('X1C2V3B9;SDK-Dev;Project-1;Title 9;Description 9;Ian Altman;Mario;'
+                'Customer Requirement;Software Development;0;1;0;Draft\n')
+
+    assert changed.wait(5)
+    assert store.load() is not rows
+    assert store.version > version
+    assert store.find('X1C2V3B9').title == 'Title 9'
+
+
+def test_notify_all_on_overflow(tmpdir, monkeypatch):
+    watcher = InotifyWatcher()
+    paths = [str(tmpdir.join('specifications.csv')), str(tmpdir.join('specifications.csv.journal'))]
+    for path in paths:
+        watcher.add(path, lambda p: None)
+
+    overflow = InotifyWatcher.event.pack(-1, InotifyWatcher.IN_Q_OVERFLOW, 0, 0)
+    monkeypatch.setattr(os, 'read', lambda fd, size: overflow)
+    assert sorted(watcher.read()) == sorted(paths), 'The lost events could be of any file'
+    monkeypatch.undo()
+    os.close(watcher.fd)